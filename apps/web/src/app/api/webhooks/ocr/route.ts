@@ -1,3 +1,4 @@
+import crypto from 'crypto'
 import { NextRequest, NextResponse } from 'next/server'
 import { createClient } from '@/lib/supabase/server'
 import { aiExtractionService } from '@/server/services/ai-extraction.service'
@@ -14,20 +15,31 @@ import { aiExtractionService } from '@/server/services/ai-extraction.service'
  *   "queue_id": "uuid",
  *   "status": "completed" | "failed",
  *   "ocr_text": "extracted text...",
- *   "error_message": "error if failed",
- *   "secret": "webhook-secret-key"
+ *   "error_message": "error if failed"
  * }
+ *
+ * Authenticated by the X-Realthor-Signature header: hex HMAC-SHA256 of the
+ * raw body, keyed with OCR_WEBHOOK_SECRET (WEBHOOK_SECRET on the VPS).
  */
 export async function POST(request: NextRequest) {
   try {
-    // Parse request body
-    const body = await request.json()
+    // Read the raw body: the signature covers the exact bytes sent
+    const rawBody = await request.text()
+    const body = JSON.parse(rawBody)
 
-    // Verify webhook secret
+    // Verify webhook signature
     const expectedSecret = process.env.OCR_WEBHOOK_SECRET
-    if (expectedSecret && body.secret !== expectedSecret) {
-      console.error('❌ Invalid webhook secret')
-      return NextResponse.json({ error: 'Unauthorized' }, { status: 401 })
+    if (expectedSecret) {
+      const signature = request.headers.get('x-realthor-signature')
+      const authorized = signature
+        ? isValidSignature(rawBody, signature, expectedSecret)
+        : // Older VPS builds send the secret in the body instead of signing
+          body.secret === expectedSecret
+
+      if (!authorized) {
+        console.error('❌ Invalid webhook signature')
+        return NextResponse.json({ error: 'Unauthorized' }, { status: 401 })
+      }
     }
 
     const { document_id, queue_id, status, ocr_text, error_message } = body
@@ -153,6 +165,15 @@ export async function POST(request: NextRequest) {
   }
 }
 
+/**
+ * Check a hex HMAC-SHA256 signature of the raw body (constant-time compare)
+ */
+function isValidSignature(rawBody: string, signature: string, secret: string): boolean {
+  const expected = crypto.createHmac('sha256', secret).update(rawBody).digest()
+  const received = Buffer.from(signature, 'hex')
+  return received.length === expected.length && crypto.timingSafeEqual(received, expected)
+}
+
 /**
  * Calculate importance score from AI metadata
  */
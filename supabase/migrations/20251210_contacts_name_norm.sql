@@ -0,0 +1,25 @@
+-- Add normalized name column to contacts for AI contact matching
+-- Lowercased, accent-free "first last" computed once on write, so the VPS
+-- matcher no longer normalizes every candidate on every match
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE EXTENSION IF NOT EXISTS unaccent;
+
+-- unaccent() is only STABLE, so wrap it in an IMMUTABLE function that can be
+-- used in a generated column (dictionary is pinned explicitly)
+CREATE OR REPLACE FUNCTION immutable_unaccent(text)
+RETURNS text AS $$
+  SELECT unaccent('unaccent'::regdictionary, $1)
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+SET search_path = public, extensions;
+
+ALTER TABLE contacts
+ADD COLUMN IF NOT EXISTS name_norm text
+GENERATED ALWAYS AS (lower(immutable_unaccent(first_name || ' ' || last_name))) STORED;
+
+-- Trigram index for fuzzy name lookups
+CREATE INDEX IF NOT EXISTS contacts_name_norm_trgm_idx
+ON contacts USING gin (name_norm gin_trgm_ops);
+
+-- Add comment
+COMMENT ON COLUMN contacts.name_norm IS 'Normalized "first last" name (lowercase, unaccented) - used for AI contact matching';
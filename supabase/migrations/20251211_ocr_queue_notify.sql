@@ -0,0 +1,19 @@
+-- Notify VPS workers when an OCR job becomes available
+-- Workers LISTEN on 'ocr_job_available' and only query the queue when woken,
+-- instead of polling get_next_ocr_job() while the queue is empty
+
+CREATE OR REPLACE FUNCTION notify_ocr_job_available()
+RETURNS TRIGGER AS $$
+BEGIN
+  PERFORM pg_notify('ocr_job_available', NEW.id::text);
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS ocr_queue_notify_trigger ON ocr_queue;
+
+CREATE TRIGGER ocr_queue_notify_trigger
+  AFTER INSERT OR UPDATE OF status ON ocr_queue
+  FOR EACH ROW
+  WHEN (NEW.status IN ('queued', 'retrying'))
+  EXECUTE FUNCTION notify_ocr_job_available();
@@ -0,0 +1,19 @@
+-- Notify VPS workers when an AI labeling job becomes available
+-- Workers LISTEN on 'ai_labeling_job_available' and only query the queue when
+-- woken, instead of polling while the queue is empty
+
+CREATE OR REPLACE FUNCTION notify_ai_labeling_job_available()
+RETURNS TRIGGER AS $$
+BEGIN
+  PERFORM pg_notify('ai_labeling_job_available', NEW.id::text);
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS ai_labeling_queue_notify_trigger ON ai_labeling_queue;
+
+CREATE TRIGGER ai_labeling_queue_notify_trigger
+  AFTER INSERT OR UPDATE OF status ON ai_labeling_queue
+  FOR EACH ROW
+  WHEN (NEW.status = 'pending')
+  EXECUTE FUNCTION notify_ai_labeling_job_available();
@@ -0,0 +1,58 @@
+-- Return the document owner from get_next_ocr_job
+-- The VPS worker needs user_id to enqueue AI labeling after OCR; returning it
+-- from the claim saves a separate documents lookup per job
+
+-- Return type changes, so the function must be dropped first
+DROP FUNCTION IF EXISTS get_next_ocr_job(text);
+
+CREATE OR REPLACE FUNCTION get_next_ocr_job(
+  vps_instance_id_param text
+)
+RETURNS TABLE (
+  queue_id uuid,
+  document_id uuid,
+  file_url text,
+  file_type text,
+  user_id uuid
+) AS $$
+DECLARE
+  job_record RECORD;
+BEGIN
+  -- Get the next job with row-level locking
+  SELECT oq.id, oq.document_id, d.file_url, d.file_type, d.user_id
+  INTO job_record
+  FROM ocr_queue oq
+  JOIN documents d ON d.id = oq.document_id
+  WHERE oq.status IN ('queued', 'retrying')
+    AND oq.attempts < oq.max_attempts
+  ORDER BY oq.priority DESC, oq.created_at ASC
+  LIMIT 1
+  FOR UPDATE SKIP LOCKED;
+
+  -- If no job found, return empty
+  IF job_record IS NULL THEN
+    RETURN;
+  END IF;
+
+  -- Update job status to processing
+  UPDATE ocr_queue
+  SET
+    status = 'processing',
+    vps_instance_id = vps_instance_id_param,
+    started_at = now(),
+    attempts = attempts + 1,
+    updated_at = now()
+  WHERE id = job_record.id;
+
+  -- Return job details
+  RETURN QUERY
+  SELECT
+    job_record.id,
+    job_record.document_id,
+    job_record.file_url,
+    job_record.file_type,
+    job_record.user_id;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+COMMENT ON FUNCTION get_next_ocr_job IS 'Thread-safe job dequeuing with row-level locking (returns document owner)';
@@ -0,0 +1,10 @@
+-- Trigram index on contact emails for AI contact matching
+-- Contact search uses pg_trgm operators (%, <%) instead of leading-wildcard
+-- ILIKE, which cannot use a btree index. Names are covered by
+-- contacts_name_norm_trgm_idx (see 20251210_contacts_name_norm.sql)
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS contacts_email_trgm_idx
+ON contacts USING gin (email gin_trgm_ops)
+WHERE email IS NOT NULL;
@@ -0,0 +1,60 @@
+-- Trigger-maintained per-status counters for ocr_queue
+-- get_queue_stats() reads these few rows instead of COUNT(*) over the whole
+-- queue on every /health and /stats call
+--
+-- Trade-off: every insert, claim and completion updates the shared counter
+-- rows (e.g. 'queued' and 'processing'), and holds those row locks until its
+-- transaction commits. Writers that change the same status therefore queue
+-- up behind each other, including concurrent FOR UPDATE SKIP LOCKED claims
+-- in get_next_ocr_job (SKIP LOCKED skips locked queue rows, not this wait).
+-- Claim transactions are short, so this is accepted in exchange for
+-- constant-time stats; revisit if claim throughput becomes the bottleneck
+
+CREATE TABLE IF NOT EXISTS ocr_queue_stats (
+  status text PRIMARY KEY,
+  cnt bigint NOT NULL DEFAULT 0
+);
+
+-- Seed from the current queue contents
+LOCK TABLE ocr_queue IN SHARE ROW EXCLUSIVE MODE;
+
+INSERT INTO ocr_queue_stats (status, cnt)
+SELECT s.status, COUNT(q.id)
+FROM unnest(ARRAY['queued', 'processing', 'completed', 'failed', 'retrying']) AS s(status)
+LEFT JOIN ocr_queue q ON q.status = s.status
+GROUP BY s.status
+ON CONFLICT (status) DO UPDATE SET cnt = EXCLUDED.cnt;
+
+CREATE OR REPLACE FUNCTION update_ocr_queue_stats()
+RETURNS TRIGGER AS $$
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    UPDATE ocr_queue_stats SET cnt = cnt - 1 WHERE status = OLD.status;
+  END IF;
+
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    UPDATE ocr_queue_stats SET cnt = cnt + 1 WHERE status = NEW.status;
+  END IF;
+
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS ocr_queue_stats_insert_delete_trigger ON ocr_queue;
+DROP TRIGGER IF EXISTS ocr_queue_stats_update_trigger ON ocr_queue;
+
+CREATE TRIGGER ocr_queue_stats_insert_delete_trigger
+  AFTER INSERT OR DELETE ON ocr_queue
+  FOR EACH ROW
+  EXECUTE FUNCTION update_ocr_queue_stats();
+
+CREATE TRIGGER ocr_queue_stats_update_trigger
+  AFTER UPDATE OF status ON ocr_queue
+  FOR EACH ROW
+  WHEN (OLD.status IS DISTINCT FROM NEW.status)
+  EXECUTE FUNCTION update_ocr_queue_stats();
+
+-- "Completed in the last 24 hours" is a sliding window and can't be kept as a
+-- counter; this index turns it into a short range scan
+CREATE INDEX IF NOT EXISTS ocr_queue_completed_at_idx ON ocr_queue(completed_at)
+  WHERE status = 'completed';
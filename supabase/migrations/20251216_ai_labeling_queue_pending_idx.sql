@@ -0,0 +1,9 @@
+-- Partial index for the AI labeling queue claim
+-- _SQL_CLAIM_AI_LABELING_JOBS picks the oldest pending rows
+-- (WHERE status = 'pending' ORDER BY created_at LIMIT n). This index holds only
+-- pending rows, so the claim stays a short index scan however large the table
+-- or the number of in-flight 'processing' rows gets
+
+CREATE INDEX IF NOT EXISTS ai_labeling_queue_pending_idx
+  ON ai_labeling_queue(created_at)
+  WHERE status = 'pending';
@@ -0,0 +1,13 @@
+-- Partial index for get_next_import_job()
+-- The claim filters status IN ('pending', 'processing') and orders by
+-- created_at; idx_contact_import_jobs_status covers the filter but not the
+-- order, and also carries 'analyzing' rows. Completed/failed jobs (most of the
+-- table over time) are left out entirely.
+--
+-- The other queues already have claim-shaped partial indexes:
+--   ocr_queue:         ocr_queue_status_priority_idx (queued/retrying)
+--   ai_labeling_queue: ai_labeling_queue_pending_idx (pending)
+
+CREATE INDEX IF NOT EXISTS contact_import_jobs_claimable_idx
+  ON contact_import_jobs(created_at)
+  WHERE status IN ('pending', 'processing');
@@ -0,0 +1,16 @@
+-- Expression indexes for contact import duplicate matching
+-- ContactImportWorker.analyze_rows() looks up only the existing contacts that
+-- share a lowercased email, normalized phone or lowercased full name with the
+-- import batch (Database.find_matching_contacts) instead of loading every
+-- contact the user has. Each predicate there matches one of these expressions.
+
+CREATE INDEX IF NOT EXISTS contacts_user_email_lower_idx
+  ON contacts(user_id, lower(email))
+  WHERE email IS NOT NULL;
+
+CREATE INDEX IF NOT EXISTS contacts_user_phone_norm_idx
+  ON contacts(user_id, regexp_replace(phone, '[^0-9+]', '', 'g'))
+  WHERE phone IS NOT NULL;
+
+CREATE INDEX IF NOT EXISTS contacts_user_full_name_lower_idx
+  ON contacts(user_id, lower(trim(first_name || ' ' || last_name)));
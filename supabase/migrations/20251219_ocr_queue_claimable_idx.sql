@@ -0,0 +1,12 @@
+-- Claim-ordered partial index for the OCR queue
+-- get_next_ocr_job() picks the next row WHERE status IN ('queued', 'retrying')
+-- ORDER BY priority DESC, created_at ASC LIMIT 1. ocr_queue_status_priority_idx
+-- has the same predicate but leads with status, so with two status values its
+-- order doesn't match the ORDER BY and the claim has to sort every claimable
+-- row. This index is keyed in claim order, so the claim reads one entry.
+-- (ai_labeling_queue_pending_idx does the same for the AI labeling queue, and
+-- ocr_queue_completed_at_idx covers the completed_today stats query.)
+
+CREATE INDEX IF NOT EXISTS ocr_queue_claimable_idx
+  ON ocr_queue(priority DESC, created_at ASC)
+  WHERE status IN ('queued', 'retrying');
@@ -0,0 +1,29 @@
+-- Notify VPS workers when a contact import job becomes claimable
+-- Workers LISTEN on 'contact_import_job_available' and only query the queue
+-- when woken, instead of polling get_next_import_job() while nothing is ready.
+-- Jobs are claimable when 'pending' (analysis) or 'processing' (execution);
+-- the worker rewrites 'processing' with progress updates, so only actual
+-- status changes notify
+
+CREATE OR REPLACE FUNCTION notify_contact_import_job_available()
+RETURNS TRIGGER AS $$
+BEGIN
+  PERFORM pg_notify('contact_import_job_available', NEW.id::text);
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS contact_import_jobs_notify_insert_trigger ON contact_import_jobs;
+DROP TRIGGER IF EXISTS contact_import_jobs_notify_update_trigger ON contact_import_jobs;
+
+CREATE TRIGGER contact_import_jobs_notify_insert_trigger
+  AFTER INSERT ON contact_import_jobs
+  FOR EACH ROW
+  WHEN (NEW.status IN ('pending', 'processing'))
+  EXECUTE FUNCTION notify_contact_import_job_available();
+
+CREATE TRIGGER contact_import_jobs_notify_update_trigger
+  AFTER UPDATE OF status ON contact_import_jobs
+  FOR EACH ROW
+  WHEN (NEW.status IN ('pending', 'processing') AND OLD.status IS DISTINCT FROM NEW.status)
+  EXECUTE FUNCTION notify_contact_import_job_available();
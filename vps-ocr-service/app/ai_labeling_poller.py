@@ -1,7 +1,8 @@
 """AI Labeling Job Poller - Polls database for AI labeling jobs and processes them"""
 
 import asyncio
-from typing import Optional, Dict, Any
+from collections import deque
+from typing import Optional, Dict, Any, List
 from loguru import logger
 from app.config import settings
 from app.database import Database
@@ -23,6 +24,9 @@ class AILabelingPoller:
         self.contact_matcher = ContactMatchingWorker()  # AI-powered contact matching
         self.is_running = False
         self.task: Optional[asyncio.Task] = None
+        self.job_available = asyncio.Event()
+        self.listening = False
+        self.claimed_jobs: deque = deque()  # Claimed in one batch, not yet started
 
     async def start(self):
         """Start polling for AI labeling jobs"""
@@ -30,6 +34,9 @@ class AILabelingPoller:
             logger.warning("AI labeling poller already running")
             return
 
+        # Wake up on NOTIFY instead of polling an empty queue
+        self.listening = await Database.listen_for_jobs("ai_labeling_job_available", self.job_available.set)
+
         self.is_running = True
         self.task = asyncio.create_task(self._poll_loop())
         logger.info(f"✅ AI labeling poller started (instance: {settings.vps_instance_id})")
@@ -48,6 +55,15 @@ class AILabelingPoller:
             except asyncio.CancelledError:
                 pass
 
+        # Hand back jobs this instance claimed but never started
+        if self.claimed_jobs:
+            await Database.release_ai_labeling_jobs(
+                [str(job["queue_id"]) for job in self.claimed_jobs]
+            )
+            self.claimed_jobs.clear()
+
+        await self.contact_matcher.close()
+
         logger.info("AI labeling poller stopped")
 
     async def _poll_loop(self):
@@ -57,19 +73,29 @@ class AILabelingPoller:
 
         while self.is_running:
             try:
-                # Get next AI labeling job from database
-                job_data = await Database.get_next_ai_labeling_job(settings.vps_instance_id)
+                if not self.claimed_jobs:
+                    # Clear before fetching so a notification arriving mid-query isn't lost
+                    self.job_available.clear()
+
+                    # Claim a batch of AI labeling jobs in one round-trip
+                    self.claimed_jobs.extend(
+                        await Database.get_next_ai_labeling_jobs(
+                            settings.vps_instance_id,
+                            settings.ai_labeling_claim_batch_size,
+                        )
+                    )
 
-                if job_data:
+                if self.claimed_jobs:
                     # Reset error counter on successful job fetch
                     consecutive_errors = 0
 
-                    # Process the job
+                    # Process the next claimed job
+                    job_data = self.claimed_jobs.popleft()
                     await self._process_job(AILabelingJob(**job_data))
 
                 else:
-                    # No jobs available, wait before polling again
-                    await asyncio.sleep(settings.poll_interval_seconds)
+                    # No jobs available, wait for a notification (or the poll interval)
+                    await self._wait_for_job()
 
             except asyncio.CancelledError:
                 logger.info("AI labeling poll loop cancelled")
@@ -92,6 +118,20 @@ class AILabelingPoller:
                 else:
                     await asyncio.sleep(10)  # Normal error backoff
 
+    async def _wait_for_job(self):
+        """Wait until a job is announced or the idle interval elapses"""
+        # Only the safety-net poll while notifications arrive; the regular
+        # poll interval while the listener is down or reconnecting
+        idle_wait_seconds = (
+            settings.listen_fallback_poll_seconds
+            if self.listening and Database.is_listening()
+            else settings.poll_interval_seconds
+        )
+        try:
+            await asyncio.wait_for(self.job_available.wait(), timeout=idle_wait_seconds)
+        except asyncio.TimeoutError:
+            pass
+
     async def _process_job(self, job: AILabelingJob):
         """
         Process a single AI labeling job
@@ -125,16 +165,19 @@ class AILabelingPoller:
 
             # Step 3: Match contacts/properties
             logger.info(f"[3/4] Matching contacts/properties")
-            await self._match_entities(job.document_id, job.user_id, metadata)
-
-            # Step 4: Mark AI processing as complete (AFTER contact matching!)
-            # This sets ai_processed_at so the frontend knows everything is done
-            logger.info(f"[4/4] Marking AI processing complete")
-            await Database.mark_ai_processing_complete(job.document_id)
+            matched_contacts = await self._match_entities(
+                job.document_id, job.user_id, metadata, job.ocr_text
+            )
 
-            # Step 5: Update queue status to completed
-            await Database.update_ai_labeling_job_status(
-                queue_id=job.queue_id, status="completed"
+            # Step 4: Link contacts and mark AI processing as complete (AFTER
+            # contact matching!). This sets ai_processed_at so the frontend
+            # knows everything is done, and completes the queue entry, all in
+            # one update
+            logger.info(f"[4/4] Linking contacts and marking AI processing complete")
+            await Database.complete_ai_labeling_job(
+                queue_id=job.queue_id,
+                document_id=job.document_id,
+                contact_ids=matched_contacts,
             )
 
             logger.info(f"✅ AI labeling job completed: {job.document_id}")
@@ -151,12 +194,16 @@ class AILabelingPoller:
                 logger.error(f"Failed to update AI labeling job status: {update_error}")
 
     async def _match_entities(
-        self, document_id: str, user_id: str, metadata: Dict[str, Any]
-    ):
+        self, document_id: str, user_id: str, metadata: Dict[str, Any], ocr_text: str
+    ) -> List[str]:
         """
         Match extracted names and addresses to contacts and properties
 
-        Uses AI-powered matching to intelligently link documents to contacts
+        Uses AI-powered matching to pick contacts for the document. Linking
+        happens in Database.complete_ai_labeling_job()
+
+        Returns:
+            Matched contact IDs (deduplicated, in match order)
         """
         extracted_names = metadata.get("extracted_names", [])
         extracted_addresses = metadata.get("extracted_addresses", [])
@@ -171,6 +218,11 @@ class AILabelingPoller:
             "extracted_addresses": extracted_addresses,
             "extracted_date_of_birth": extracted_date_of_birth,  # CRITICAL for ID matching
             "extracted_place_of_birth": extracted_place_of_birth,  # CRITICAL for ID matching
+            # OCR excerpt for the prompt, truncated once per document on UTF-8
+            # byte boundaries (never splitting a character)
+            "ocr_snippet_short": ocr_text.encode("utf-8")[
+                :ContactMatchingWorker.OCR_SNIPPET_MAX_BYTES
+            ].decode("utf-8", errors="ignore"),
         }
 
         # Match contacts from extracted names
@@ -183,9 +235,10 @@ class AILabelingPoller:
             if extracted_place_of_birth:
                 logger.info(f"🌍 Extracted place of birth: {extracted_place_of_birth}")
 
+            # Step 1: Search for candidate contacts for each name
+            match_items = []
             for name in extracted_names:
                 try:
-                    # Step 1: Search for candidate contacts
                     logger.info(f"🔍 Searching for contact: '{name}' (user_id: {user_id[:8]}...)")
                     candidates = await Database.search_contacts_by_name(
                         user_id=user_id,
@@ -198,36 +251,28 @@ class AILabelingPoller:
                         continue
 
                     logger.info(f"✅ Found {len(candidates)} contact candidate(s) for '{name}'")
-
-                    # Step 2: Use AI to choose the best match (with document context)
-                    matched_contact_id = await self.contact_matcher.match_contact(
-                        extracted_name=name,
-                        candidates=candidates,
-                        document_context=document_context
-                    )
-
-                    # Step 3: Link if confident match found
-                    if matched_contact_id:
-                        success = await Database.link_contact_to_document(
-                            document_id=document_id,
-                            contact_id=matched_contact_id
-                        )
-                        if success:
-                            matched_contacts.append(matched_contact_id)
-                            logger.info(f"🔗 Linked contact {matched_contact_id} to document")
-                        else:
-                            logger.warning(f"⚠️ Failed to link contact {matched_contact_id} to document")
-                    else:
-                        logger.info(f"⚠️ No confident match for '{name}', skipping auto-link")
+                    match_items.append((name, candidates, document_context))
 
                 except Exception as e:
-                    logger.error(f"Failed to match contact for name '{name}': {e}")
+                    logger.error(f"Failed to search contacts for name '{name}': {e}")
                     continue
 
+            # Step 2: Use AI to choose the best match for all names concurrently
+            matched_contact_ids = await self.contact_matcher.match_many(match_items)
+
+            # Step 3: Collect confident matches; they are linked with the final update
+            for (name, _, _), matched_contact_id in zip(match_items, matched_contact_ids):
+                if matched_contact_id:
+                    if matched_contact_id not in matched_contacts:
+                        matched_contacts.append(matched_contact_id)
+                else:
+                    logger.info(f"⚠️ No confident match for '{name}', skipping auto-link")
+
         # Log matching summary
         if matched_contacts:
             logger.info(
-                f"✅ Auto-linked {len(matched_contacts)} contact(s) to document {document_id}"
+                f"✅ Matched {len(matched_contacts)} contact(s) to document {document_id}: "
+                f"{', '.join(matched_contacts)}"
             )
         elif extracted_names:
             logger.info(f"⚠️ No contacts auto-linked for document {document_id} (had {len(extracted_names)} extracted name(s))")
@@ -240,3 +285,5 @@ class AILabelingPoller:
             logger.info(f"🏠 Extracted addresses: {', '.join(extracted_addresses)}")
             # Placeholder for future property matching implementation
             pass
+
+        return matched_contacts
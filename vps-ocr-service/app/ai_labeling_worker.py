@@ -8,9 +8,16 @@ import json
 from typing import Dict, Any, Optional
 from loguru import logger
 import httpx
+import orjson
 from app.config import settings
 from app.document_categories import SYSTEM_PROMPT, get_importance_score
 
+# The system prompt is several KB and identical on every call, so its
+# message is serialized once and embedded into each request body as-is
+_SYSTEM_MESSAGE_JSON = orjson.Fragment(
+    orjson.dumps({"role": "system", "content": SYSTEM_PROMPT})
+)
+
 
 class AILabelingWorker:
     """
@@ -107,7 +114,7 @@ class AILabelingWorker:
         payload = {
             "model": self.model,
             "messages": [
-                {"role": "system", "content": SYSTEM_PROMPT},
+                _SYSTEM_MESSAGE_JSON,
                 {
                     "role": "user",
                     "content": f"Analyze this OCR text and extract metadata:\n\n{ocr_text}"
@@ -122,7 +129,7 @@ class AILabelingWorker:
             response = await client.post(
                 f"{self.api_base}/v1/chat/completions",
                 headers=headers,
-                json=payload,
+                content=orjson.dumps(payload),
             )
 
             response.raise_for_status()
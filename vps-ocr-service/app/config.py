@@ -13,11 +13,34 @@ class Settings(BaseSettings):
 
     # Database
     database_url: str
+    # Direct (non-pgbouncer) connection used for LISTEN/NOTIFY job wakeups and
+    # for hot worker queries with prepared-statement caching. Transaction-mode
+    # pgbouncer supports neither; if unset, everything goes through database_url
+    # and pollers fall back to plain interval polling.
+    database_direct_url: Optional[str] = None
+    db_pool_min_size: int = 3
+    db_pool_max_size: int = 15
+    db_direct_pool_min_size: int = 2  # Warm direct connections for the worker loops
+    db_direct_pool_max_size: int = 10
+    db_acquire_timeout_seconds: float = 5.0  # Fail fast instead of stalling on an exhausted pool
 
     # OCR
     ocr_language: str = "es,en"
     ocr_use_gpu: bool = False
     ocr_batch_size: int = 1
+    ocr_rec_batch_num: int = 32  # Text crops per recognition/angle-classifier forward pass
+    ocr_enable_mkldnn: bool = True  # oneDNN (MKL-DNN) kernels for CPU inference
+    ocr_cpu_threads: int = 2  # Paddle math threads; match the VPS vCPU count
+    ocr_use_tensorrt: bool = False  # TensorRT subgraphs (GPU only)
+    ocr_precision: str = "fp32"  # fp32, fp16 or int8 (int8 needs quantized models)
+    ocr_det_model_dir: Optional[str] = None  # Local inference models; None = PaddleOCR defaults
+    ocr_rec_model_dir: Optional[str] = None
+    ocr_cls_model_dir: Optional[str] = None
+    ocr_processes: int = 0  # Separate OCR processes, each loading the models (0 = in-process)
+    max_concurrent_ocr: int = 1  # Documents in OCR at once (downloads are not limited)
+    pdf_render_workers: int = 2  # PDF pages rendered in parallel (one pdftoppm process each)
+    ocr_dpi: int = 200  # PDF rasterization resolution
+    ocr_grayscale: bool = False  # Rasterize PDF pages in grayscale
     max_file_size_mb: int = 50
 
     # Embeddings (deprecated but kept for backward compatibility)
@@ -26,10 +49,12 @@ class Settings(BaseSettings):
     embeddings_chunk_size: int = 500
     embeddings_chunk_overlap: int = 50
     embeddings_batch_size: int = 8
+    embeddings_int8: bool = True  # Dynamic INT8 quantization of Linear layers on CPU
 
     # AI Labeling
     deepseek_api_key: Optional[str] = None
     ai_labeling_enabled: bool = True  # Enable/disable AI labeling feature
+    ai_labeling_claim_batch_size: int = 8  # Jobs claimed per queue round-trip
 
     # Contact Import
     contact_import_enabled: bool = True  # Enable/disable contact import feature
@@ -37,6 +62,7 @@ class Settings(BaseSettings):
 
     # Queue
     poll_interval_seconds: int = 5
+    listen_fallback_poll_seconds: int = 60  # Safety-net poll when LISTEN/NOTIFY is active
     max_retries: int = 3
     job_timeout_minutes: int = 15
 
@@ -55,6 +81,7 @@ class Settings(BaseSettings):
     log_file: str = "/var/log/ocr-service/app.log"
     log_rotation: str = "100 MB"
     log_retention: str = "10 days"
+    log_compression: Optional[str] = "gz"  # Rotated files, compressed on the log thread
 
     # Performance
     worker_threads: int = 1
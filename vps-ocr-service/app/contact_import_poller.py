@@ -7,6 +7,7 @@ and execution phase (creating/updating contacts).
 """
 
 import asyncio
+import asyncpg
 from typing import Optional
 from loguru import logger
 from dataclasses import asdict
@@ -32,6 +33,8 @@ class ContactImportPoller:
         self.worker = worker
         self.is_running = False
         self.task: Optional[asyncio.Task] = None
+        self.job_available = asyncio.Event()
+        self.listening = False
 
     async def start(self):
         """Start polling for jobs"""
@@ -39,6 +42,9 @@ class ContactImportPoller:
             logger.warning("Contact import poller already running")
             return
 
+        # Wake up on NOTIFY instead of polling an empty queue
+        self.listening = await Database.listen_for_jobs("contact_import_job_available", self.job_available.set)
+
         self.is_running = True
         self.task = asyncio.create_task(self._poll_loop())
         logger.info(f"Contact import poller started (instance: {settings.vps_instance_id})")
@@ -66,6 +72,9 @@ class ContactImportPoller:
 
         while self.is_running:
             try:
+                # Clear before fetching so a notification arriving mid-query isn't lost
+                self.job_available.clear()
+
                 # Get next job from database
                 job_data = await Database.get_next_import_job(settings.vps_instance_id)
 
@@ -76,8 +85,8 @@ class ContactImportPoller:
                     # Process the job
                     await self._process_job(job_data)
                 else:
-                    # No jobs available, wait before polling again
-                    await asyncio.sleep(settings.poll_interval_seconds)
+                    # No jobs available, wait for a notification (or the poll interval)
+                    await self._wait_for_job()
 
             except asyncio.CancelledError:
                 logger.info("Contact import poll loop cancelled")
@@ -99,7 +108,21 @@ class ContactImportPoller:
                 else:
                     await asyncio.sleep(10)
 
-    async def _process_job(self, job_data: dict):
+    async def _wait_for_job(self):
+        """Wait until a job is announced or the idle interval elapses"""
+        # Only the safety-net poll while notifications arrive; the regular
+        # poll interval while the listener is down or reconnecting
+        idle_wait_seconds = (
+            settings.listen_fallback_poll_seconds
+            if self.listening and Database.is_listening()
+            else settings.poll_interval_seconds
+        )
+        try:
+            await asyncio.wait_for(self.job_available.wait(), timeout=idle_wait_seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _process_job(self, job_data: asyncpg.Record):
         """
         Process a single import job
 
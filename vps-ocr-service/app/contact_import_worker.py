@@ -5,10 +5,13 @@ Handles CSV/Excel parsing, AI column mapping, duplicate detection,
 and contact creation/update for the contact import system.
 """
 
+import aiohttp
 import csv
 import io
 import json
+import orjson
 import re
+from datetime import date, datetime
 from typing import Dict, List, Any, Optional, Tuple
 from dataclasses import dataclass
 from loguru import logger
@@ -17,6 +20,15 @@ from app.config import settings
 from app.database import Database
 
 
+# Date formats accepted in imports, tried in order after ISO
+_ISO_DATE_RE = re.compile(r'\d{4}-\d{2}-\d{2}')  # 2000-01-15
+_DATE_PATTERNS = [
+    (re.compile(r'(\d{2})/(\d{2})/(\d{4})'), '%d/%m/%Y'),  # 15/01/2000
+    (re.compile(r'(\d{2})-(\d{2})-(\d{4})'), '%d-%m-%Y'),  # 15-01-2000
+    (re.compile(r'(\d{2})/(\d{2})/(\d{2})'), '%d/%m/%y'),  # 15/01/00
+]
+
+
 @dataclass
 class ImportRow:
     """Parsed and analyzed import row"""
@@ -64,6 +76,9 @@ class ContactImportWorker:
         "category": ["category", "categoria", "client category", "categoria de cliente", "stage", "etapa"],
     }
 
+    # Rows per bulk contact INSERT / row-result UPDATE during execute_import
+    IMPORT_BATCH_SIZE = 500
+
     # Valid role values for the database constraint
     VALID_ROLES = ["buyer", "seller", "lender", "tenant", "landlord", "other"]
 
@@ -176,8 +191,6 @@ class ContactImportWorker:
     ) -> Dict[str, str]:
         """Use Deepseek AI to map remaining columns"""
         try:
-            import aiohttp
-
             # Build prompt
             sample_data = "\n".join([
                 ", ".join([f"{k}: {v}" for k, v in row.items()])
@@ -305,8 +318,6 @@ Example: {{"Telefono Movil": "phone", "Direccion": "address_street"}}
 
         Returns list of role strings (or None if couldn't determine).
         """
-        import aiohttp
-
         # Build contact summaries for the prompt
         contact_summaries = []
         for i, (contact, raw_row) in enumerate(contacts_with_raw):
@@ -561,19 +572,6 @@ Return ONLY the JSON object, no explanations."""
 
         Returns list of ImportRow with analysis results
         """
-        # Get existing contacts for matching
-        existing_contacts = await Database.get_user_contacts_for_matching(user_id)
-        logger.info(f"Loaded {len(existing_contacts)} existing contacts for matching")
-
-        # Build lookup indexes for fast matching
-        email_index = {c["email"].lower(): c for c in existing_contacts if c.get("email")}
-        phone_index = {self._normalize_phone(c["phone"]): c for c in existing_contacts if c.get("phone")}
-        name_index = {}
-        for c in existing_contacts:
-            key = f"{c['first_name']} {c['last_name']}".lower().strip()
-            if key:
-                name_index[key] = c
-
         # Phase 1: Map all rows first
         mapped_rows = []  # List of (row_number, raw_row, mapped_data)
         for i, raw_row in enumerate(rows, start=1):
@@ -608,6 +606,38 @@ Return ONLY the JSON object, no explanations."""
                 role_counts[role] = role_counts.get(role, 0) + 1
             logger.info(f"Role distribution after deduction: {role_counts}")
 
+        # Build lookup indexes for fast matching from only the existing
+        # contacts that share an email, phone or name with an import row.
+        # Rows come newest first, so on collisions the oldest contact wins
+        emails = set()
+        phones = set()
+        names = set()
+        for _, _, mapped_data in mapped_rows:
+            if mapped_data.get("email"):
+                emails.add(mapped_data["email"].lower())
+            if mapped_data.get("phone"):
+                phone = self._normalize_phone(mapped_data["phone"])
+                if phone:
+                    phones.add(phone)
+            names.add(f"{mapped_data['first_name']} {mapped_data['last_name']}".lower())
+
+        existing_contacts = await Database.find_matching_contacts(
+            user_id, list(emails), list(phones), list(names)
+        )
+        logger.info(f"Found {len(existing_contacts)} existing contact(s) that may match")
+
+        email_index = {}
+        phone_index = {}
+        name_index = {}
+        for c in existing_contacts:
+            if c["email"]:
+                email_index[c["email"].lower()] = c
+            if c["phone"]:
+                phone_index[self._normalize_phone(c["phone"])] = c
+            key = f"{c['first_name']} {c['last_name']}".lower().strip()
+            if key:
+                name_index[key] = c
+
         # Phase 3: Analyze for duplicates and conflicts
         analyzed_rows = []
         for row_number, raw_row, mapped_data in mapped_rows:
@@ -693,19 +723,15 @@ Return ONLY the JSON object, no explanations."""
 
     def _parse_date(self, value: str) -> Optional[str]:
         """Parse date string to YYYY-MM-DD format"""
-        import re
-        from datetime import datetime
-
-        # Common date patterns
-        patterns = [
-            (r'(\d{4})-(\d{2})-(\d{2})', '%Y-%m-%d'),  # 2000-01-15
-            (r'(\d{2})/(\d{2})/(\d{4})', '%d/%m/%Y'),  # 15/01/2000
-            (r'(\d{2})-(\d{2})-(\d{4})', '%d-%m-%Y'),  # 15-01-2000
-            (r'(\d{2})/(\d{2})/(\d{2})', '%d/%m/%y'),  # 15/01/00
-        ]
+        # Already ISO: validate with the C parser and keep the value as-is
+        if _ISO_DATE_RE.fullmatch(value):
+            try:
+                return date.fromisoformat(value).isoformat()
+            except ValueError:
+                return None
 
-        for pattern, fmt in patterns:
-            if re.match(pattern, value):
+        for pattern, fmt in _DATE_PATTERNS:
+            if pattern.match(value):
                 try:
                     dt = datetime.strptime(value, fmt)
                     return dt.strftime('%Y-%m-%d')
@@ -802,12 +828,17 @@ Return ONLY the JSON object, no explanations."""
 
         Returns counts of created, updated, skipped
         """
-        rows = await Database.get_import_rows_for_processing(job_id)
-        logger.info(f"Executing import for job {job_id}: {len(rows)} rows to process")
+        logger.info(f"Executing import for job {job_id}")
 
         stats = {"created": 0, "updated": 0, "skipped": 0, "errors": 0}
 
-        for row in rows:
+        # New contacts and row results are buffered and written in batches;
+        # updates to existing contacts are still applied row by row
+        pending_creates: List[Tuple[str, Dict[str, Any]]] = []
+        row_results: List[Tuple[str, str, Optional[str], Optional[str]]] = []
+
+        # Rows are streamed from a server-side cursor rather than loaded at once
+        async for row in Database.iter_import_rows_for_processing(job_id):
             try:
                 row_id = str(row["id"])
                 mapped_data = row["mapped_data"]
@@ -818,41 +849,28 @@ Return ONLY the JSON object, no explanations."""
 
                 if not mapped_data:
                     logger.warning(f"Row {row['row_number']}: No mapped data, skipping")
-                    await Database.update_import_row_result(row_id, "skipped")
+                    row_results.append((row_id, "skipped", None, None))
                     stats["skipped"] += 1
                     continue
 
                 # Parse mapped_data if it's a string
                 if isinstance(mapped_data, str):
-                    mapped_data = json.loads(mapped_data)
+                    mapped_data = orjson.loads(mapped_data)
 
                 # Determine action based on status and decision
                 if status == "new":
                     # Always create new contacts
-                    contact_id = await Database.create_contact(user_id, mapped_data)
-                    if contact_id:
-                        await Database.update_import_row_result(row_id, "imported", contact_id)
-                        stats["created"] += 1
-                        logger.debug(f"Row {row['row_number']}: Created contact {contact_id}")
-                    else:
-                        await Database.update_import_row_result(row_id, "skipped", error="Failed to create")
-                        stats["errors"] += 1
+                    pending_creates.append((row_id, mapped_data))
 
                 elif status in ["duplicate", "conflict"]:
                     # Handle based on decision
                     if decision == "skip":
-                        await Database.update_import_row_result(row_id, "skipped")
+                        row_results.append((row_id, "skipped", None, None))
                         stats["skipped"] += 1
 
                     elif decision == "create":
                         # Create as new even though duplicate
-                        contact_id = await Database.create_contact(user_id, mapped_data)
-                        if contact_id:
-                            await Database.update_import_row_result(row_id, "imported", contact_id)
-                            stats["created"] += 1
-                        else:
-                            await Database.update_import_row_result(row_id, "skipped", error="Failed to create")
-                            stats["errors"] += 1
+                        pending_creates.append((row_id, mapped_data))
 
                     elif decision == "update" or decision is None:
                         # Update existing contact
@@ -861,7 +879,7 @@ Return ONLY the JSON object, no explanations."""
                             if overwrite_fields:
                                 # Parse if string
                                 if isinstance(overwrite_fields, str):
-                                    overwrite_fields = json.loads(overwrite_fields)
+                                    overwrite_fields = orjson.loads(overwrite_fields)
                                 # Only update specified fields
                                 await Database.update_contact(
                                     matched_contact_id,
@@ -877,17 +895,12 @@ Return ONLY the JSON object, no explanations."""
                                     only_empty_fields=True
                                 )
 
-                            await Database.update_import_row_result(row_id, "imported", matched_contact_id)
+                            row_results.append((row_id, "imported", str(matched_contact_id), None))
                             stats["updated"] += 1
                             logger.debug(f"Row {row['row_number']}: Updated contact {matched_contact_id}")
                         else:
                             # No matched contact, create new
-                            contact_id = await Database.create_contact(user_id, mapped_data)
-                            if contact_id:
-                                await Database.update_import_row_result(row_id, "imported", contact_id)
-                                stats["created"] += 1
-                            else:
-                                stats["errors"] += 1
+                            pending_creates.append((row_id, mapped_data))
 
                     else:
                         # No decision made - in turbo mode, default to enrich
@@ -897,22 +910,66 @@ Return ONLY the JSON object, no explanations."""
                                 mapped_data,
                                 only_empty_fields=True
                             )
-                            await Database.update_import_row_result(row_id, "imported", matched_contact_id)
+                            row_results.append((row_id, "imported", str(matched_contact_id), None))
                             stats["updated"] += 1
                         else:
-                            await Database.update_import_row_result(row_id, "skipped")
+                            row_results.append((row_id, "skipped", None, None))
                             stats["skipped"] += 1
 
             except Exception as e:
                 logger.error(f"Error processing row {row.get('row_number')}: {e}")
-                await Database.update_import_row_result(
-                    str(row["id"]),
-                    "skipped",
-                    error=str(e)
-                )
+                row_results.append((str(row["id"]), "skipped", None, str(e)))
                 stats["errors"] += 1
 
+            if len(pending_creates) + len(row_results) >= self.IMPORT_BATCH_SIZE:
+                await self._flush_import_batch(user_id, pending_creates, row_results, stats)
+
+        await self._flush_import_batch(user_id, pending_creates, row_results, stats)
+
         logger.info(f"Import complete: created={stats['created']}, updated={stats['updated']}, "
                    f"skipped={stats['skipped']}, errors={stats['errors']}")
 
         return stats
+
+    async def _flush_import_batch(
+        self,
+        user_id: str,
+        pending_creates: List[Tuple[str, Dict[str, Any]]],
+        row_results: List[Tuple[str, str, Optional[str], Optional[str]]],
+        stats: Dict[str, int]
+    ):
+        """
+        Create buffered contacts in one INSERT and write buffered row results
+
+        If the bulk insert fails (e.g. one row violates a constraint), the
+        batch falls back to per-contact inserts so only the bad rows are
+        recorded as errors. Both buffers are cleared.
+        """
+        if pending_creates:
+            try:
+                contact_ids = await Database.create_contacts_bulk(
+                    user_id, [mapped_data for _, mapped_data in pending_creates]
+                )
+                for (row_id, _), contact_id in zip(pending_creates, contact_ids):
+                    row_results.append((row_id, "imported", contact_id, None))
+                stats["created"] += len(contact_ids)
+
+            except Exception as e:
+                logger.warning(f"Bulk contact insert failed, retrying row by row: {e}")
+                for row_id, mapped_data in pending_creates:
+                    try:
+                        contact_id = await Database.create_contact(user_id, mapped_data)
+                        if contact_id:
+                            row_results.append((row_id, "imported", contact_id, None))
+                            stats["created"] += 1
+                        else:
+                            row_results.append((row_id, "skipped", None, "Failed to create"))
+                            stats["errors"] += 1
+                    except Exception as row_error:
+                        row_results.append((row_id, "skipped", None, str(row_error)))
+                        stats["errors"] += 1
+
+            pending_creates.clear()
+
+        await Database.update_import_row_results(row_results)
+        row_results.clear()
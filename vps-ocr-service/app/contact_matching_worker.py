@@ -5,29 +5,78 @@ Uses Deepseek AI to intelligently match extracted names from documents
 to existing contacts in the database.
 """
 
+import asyncio
+import difflib
 import httpx
 import json
-from typing import List, Dict, Any, Optional
+import unicodedata
+from typing import List, Dict, Any, Mapping, Optional, Tuple
 from loguru import logger
 from app.config import settings
 
 
+def normalize_name(name: str) -> str:
+    """
+    Normalize a person name for comparison (lowercase, unaccented)
+
+    Mirrors the contacts.name_norm generated column
+    """
+    decomposed = unicodedata.normalize("NFKD", name)
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(stripped.lower().split())
+
+
 class ContactMatchingWorker:
     """
     Matches extracted names from documents to existing contacts using AI
     """
 
+    # Maximum number of concurrent Deepseek matching requests
+    MAX_CONCURRENT_MATCHES = 8
+
+    # Pre-rank thresholds for the cheap confirmation path: the top candidate's
+    # name similarity must be high and clearly ahead of the runner-up
+    FAST_PATH_MIN_SCORE = 0.88
+    FAST_PATH_MIN_MARGIN = 0.10
+
+    # Deepseek call tuning: bounded connect/pool waits, transport-level connect
+    # retries, and exponential backoff on timeouts / transient HTTP errors
+    API_TIMEOUT = httpx.Timeout(connect=5.0, read=25.0, write=10.0, pool=2.0)
+    API_TRANSPORT_RETRIES = 2
+    API_MAX_ATTEMPTS = 3
+    API_BACKOFF_BASE_SECONDS = 0.5
+    API_BACKOFF_MAX_SECONDS = 4.0
+
+    # Maximum size of the OCR excerpt included in matching prompts (UTF-8 bytes)
+    OCR_SNIPPET_MAX_BYTES = 300
+
     def __init__(self):
         if not settings.deepseek_api_key:
             raise ValueError("DEEPSEEK_API_KEY is required for contact matching")
         self.api_key = settings.deepseek_api_key
         self.model = "deepseek-chat"
         self.api_url = "https://api.deepseek.com/v1/chat/completions"
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Get the shared HTTP client (created on first use)"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=self.API_TIMEOUT,
+                transport=httpx.AsyncHTTPTransport(retries=self.API_TRANSPORT_RETRIES),
+            )
+        return self._client
+
+    async def close(self):
+        """Close the shared HTTP client"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
 
     async def match_contact(
         self,
         extracted_name: str,
-        candidates: List[Dict[str, Any]],
+        candidates: List[Mapping[str, Any]],
         document_context: Optional[Dict[str, Any]] = None
     ) -> Optional[str]:
         """
@@ -45,10 +94,20 @@ class ContactMatchingWorker:
             logger.debug(f"No candidates for '{extracted_name}', skipping match")
             return None
 
-        # Build prompt with candidates and document context
-        prompt = self._build_matching_prompt(extracted_name, candidates, document_context)
-
         try:
+            # Easy case: one candidate clearly stands out by name, so a short
+            # yes/no confirmation is enough
+            top_candidate = self._get_unambiguous_candidate(extracted_name, candidates)
+            if top_candidate:
+                matched_contact_id = await self._confirm_match(
+                    extracted_name, top_candidate, document_context
+                )
+                if matched_contact_id:
+                    return matched_contact_id
+
+            # Build prompt with candidates and document context
+            prompt = self._build_matching_prompt(extracted_name, candidates, document_context)
+
             # Call Deepseek API
             response = await self._call_deepseek_api(prompt)
 
@@ -81,68 +140,183 @@ class ContactMatchingWorker:
             logger.error(f"Failed to match contact for '{extracted_name}': {e}")
             return None
 
-    def _build_matching_prompt(
+    def _get_unambiguous_candidate(
+        self,
+        extracted_name: str,
+        candidates: List[Mapping[str, Any]]
+    ) -> Optional[Mapping[str, Any]]:
+        """
+        Pre-rank candidates by name similarity
+
+        Returns the top candidate if it clearly beats the others, else None
+        """
+        target = normalize_name(extracted_name)
+        target_sorted = " ".join(sorted(target.split()))
+
+        scored = []
+        for candidate in candidates:
+            # name_norm is precomputed by the database; fall back for older rows
+            candidate_name = candidate.get("name_norm") or normalize_name(
+                f"{candidate.get('first_name') or ''} {candidate.get('last_name') or ''}"
+            )
+            # Token-sorted comparison handles reversed names ("Garcia, Maria")
+            score = max(
+                difflib.SequenceMatcher(None, target, candidate_name).ratio(),
+                difflib.SequenceMatcher(
+                    None, target_sorted, " ".join(sorted(candidate_name.split()))
+                ).ratio(),
+            )
+            scored.append((score, candidate))
+
+        scored.sort(key=lambda item: item[0], reverse=True)
+
+        top_score, top_candidate = scored[0]
+        second_score = scored[1][0] if len(scored) > 1 else 0.0
+
+        if top_score >= self.FAST_PATH_MIN_SCORE and top_score - second_score >= self.FAST_PATH_MIN_MARGIN:
+            return top_candidate
+        return None
+
+    async def _confirm_match(
         self,
         extracted_name: str,
-        candidates: List[Dict[str, Any]],
+        candidate: Mapping[str, Any],
         document_context: Optional[Dict[str, Any]] = None
-    ) -> str:
-        """Build the prompt for AI contact matching"""
+    ) -> Optional[str]:
+        """
+        Ask the AI for a short yes/no confirmation of a single candidate
 
-        # Format candidates for the prompt
-        candidates_text = []
-        for i, candidate in enumerate(candidates, 1):
-            candidate_info = [
-                f"Candidate {i}:",
-                f"  ID: {candidate['id']}",
-                f"  Name: {candidate['first_name']} {candidate['last_name']}",
-            ]
-
-            if candidate.get("email"):
-                candidate_info.append(f"  Email: {candidate['email']}")
-            if candidate.get("phone"):
-                candidate_info.append(f"  Phone: {candidate['phone']}")
-            if candidate.get("date_of_birth"):
-                candidate_info.append(f"  Date of Birth: {candidate['date_of_birth']}")
-            if candidate.get("place_of_birth"):
-                candidate_info.append(f"  Place of Birth: {candidate['place_of_birth']}")
-            if candidate.get("company"):
-                candidate_info.append(f"  Company: {candidate['company']}")
-            if candidate.get("job_title"):
-                candidate_info.append(f"  Job Title: {candidate['job_title']}")
-            if candidate.get("address_city") or candidate.get("address_state"):
-                location = f"{candidate.get('address_city', '')}, {candidate.get('address_state', '')}".strip(
-                    ", "
-                )
-                candidate_info.append(f"  Location: {location}")
+        Returns the contact ID if confirmed with confidence >= 0.8, else None
+        (the caller then falls back to the full matching prompt)
+        """
+        prompt = f"""Does this contact match the person named in a document?
 
-            candidates_text.append("\n".join(candidate_info))
+**Extracted name from document:** "{extracted_name}"{self._build_context_section(document_context)}
 
-        # Build document context section
-        context_section = ""
-        if document_context:
-            context_parts = []
+**Contact:**
+{self._format_candidate(1, candidate)}
 
-            # ✨ ADD EXTRACTED DATES FROM DOCUMENT (CRITICAL FOR ID MATCHING!)
-            if document_context.get("extracted_date_of_birth"):
-                date_of_birth = document_context["extracted_date_of_birth"]
-                context_parts.append(f"**🎂 Date of birth shown in document:** {date_of_birth}")
+If the document gives a date or place of birth that contradicts the contact, it is NOT a match.
 
-            if document_context.get("extracted_place_of_birth"):
-                place_of_birth = document_context["extracted_place_of_birth"]
-                context_parts.append(f"**🌍 Place of birth shown in document:** {place_of_birth}")
+**Response format (JSON only):**
+{{"match": true, "confidence": 0.95}}"""
 
-            # Add extracted addresses/locations
-            if document_context.get("extracted_addresses"):
-                addresses = document_context["extracted_addresses"]
-                context_parts.append(f"**Locations/Addresses mentioned in document:** {', '.join(addresses)}")
+        try:
+            response = await self._call_deepseek_api(prompt, max_tokens=50)
+            result = json.loads(self._strip_code_fences(response))
+        except Exception as e:
+            logger.debug(f"Confirmation failed for '{extracted_name}': {e}")
+            return None
 
-            # Add any other useful context
-            if document_context.get("ocr_snippet"):
-                context_parts.append(f"**Document text excerpt:** {document_context['ocr_snippet'][:300]}...")
+        confidence = result.get("confidence", 0) or 0
+        if result.get("match") is True and confidence >= 0.8:
+            logger.info(
+                f"✅ Confirmed '{extracted_name}' → Contact {candidate['id']} "
+                f"(confidence: {confidence:.2f})"
+            )
+            return str(candidate["id"])
 
-            if context_parts:
-                context_section = "\n\n" + "\n".join(context_parts) + "\n"
+        logger.debug(f"Confirmation rejected for '{extracted_name}', using full matching prompt")
+        return None
+
+    async def match_many(
+        self,
+        items: List[Tuple[str, List[Mapping[str, Any]], Optional[Dict[str, Any]]]]
+    ) -> List[Optional[str]]:
+        """
+        Match several extracted names concurrently.
+
+        Each match is an independent API call, so they are fired together
+        (bounded by MAX_CONCURRENT_MATCHES) instead of one after another.
+
+        Args:
+            items: List of (extracted_name, candidates, document_context) tuples
+
+        Returns:
+            Matched contact IDs (or None) in the same order as items
+        """
+        semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_MATCHES)
+
+        async def _match_one(item):
+            async with semaphore:
+                return await self.match_contact(*item)
+
+        return await asyncio.gather(*[_match_one(item) for item in items])
+
+    def _format_candidate(self, index: int, candidate: Mapping[str, Any]) -> str:
+        """Format a single contact candidate for a prompt"""
+        candidate_info = [
+            f"Candidate {index}:",
+            f"  ID: {candidate['id']}",
+            f"  Name: {candidate['first_name']} {candidate['last_name']}",
+        ]
+
+        if candidate.get("email"):
+            candidate_info.append(f"  Email: {candidate['email']}")
+        if candidate.get("phone"):
+            candidate_info.append(f"  Phone: {candidate['phone']}")
+        if candidate.get("date_of_birth"):
+            candidate_info.append(f"  Date of Birth: {candidate['date_of_birth']}")
+        if candidate.get("place_of_birth"):
+            candidate_info.append(f"  Place of Birth: {candidate['place_of_birth']}")
+        if candidate.get("company"):
+            candidate_info.append(f"  Company: {candidate['company']}")
+        if candidate.get("job_title"):
+            candidate_info.append(f"  Job Title: {candidate['job_title']}")
+        if candidate.get("address_city") or candidate.get("address_state"):
+            location = f"{candidate.get('address_city', '')}, {candidate.get('address_state', '')}".strip(
+                ", "
+            )
+            candidate_info.append(f"  Location: {location}")
+
+        return "\n".join(candidate_info)
+
+    def _build_context_section(self, document_context: Optional[Dict[str, Any]]) -> str:
+        """Build the document context section of a prompt"""
+        if not document_context:
+            return ""
+
+        context_parts = []
+
+        # ✨ ADD EXTRACTED DATES FROM DOCUMENT (CRITICAL FOR ID MATCHING!)
+        if document_context.get("extracted_date_of_birth"):
+            date_of_birth = document_context["extracted_date_of_birth"]
+            context_parts.append(f"**🎂 Date of birth shown in document:** {date_of_birth}")
+
+        if document_context.get("extracted_place_of_birth"):
+            place_of_birth = document_context["extracted_place_of_birth"]
+            context_parts.append(f"**🌍 Place of birth shown in document:** {place_of_birth}")
+
+        # Add extracted addresses/locations
+        if document_context.get("extracted_addresses"):
+            addresses = document_context["extracted_addresses"]
+            context_parts.append(f"**Locations/Addresses mentioned in document:** {', '.join(addresses)}")
+
+        # Add any other useful context
+        if document_context.get("ocr_snippet_short"):
+            context_parts.append(f"**Document text excerpt:** {document_context['ocr_snippet_short']}...")
+
+        if not context_parts:
+            return ""
+
+        return "\n\n" + "\n".join(context_parts) + "\n"
+
+    def _build_matching_prompt(
+        self,
+        extracted_name: str,
+        candidates: List[Mapping[str, Any]],
+        document_context: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """Build the prompt for AI contact matching"""
+
+        # Format candidates for the prompt
+        candidates_text = [
+            self._format_candidate(i, candidate)
+            for i, candidate in enumerate(candidates, 1)
+        ]
+
+        # Build document context section
+        context_section = self._build_context_section(document_context)
 
         prompt = f"""You are an expert at matching person names from documents to database contacts.
 
@@ -239,43 +413,69 @@ Candidate 2:
 
         return prompt
 
-    async def _call_deepseek_api(self, prompt: str) -> str:
-        """Call Deepseek API with the matching prompt"""
-
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(
-                self.api_url,
-                headers={
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json",
-                },
-                json={
-                    "model": self.model,
-                    "messages": [{"role": "user", "content": prompt}],
-                    "temperature": 0.1,  # Low temperature for deterministic matching
-                    "max_tokens": 300,
-                    "response_format": {"type": "json_object"},
-                },
-            )
-            response.raise_for_status()
-            data = response.json()
+    async def _call_deepseek_api(self, prompt: str, max_tokens: int = 300) -> str:
+        """
+        Call Deepseek API with the matching prompt
+
+        Retries timeouts, 429 and 5xx responses with exponential backoff
+        """
+        for attempt in range(1, self.API_MAX_ATTEMPTS + 1):
+            try:
+                response = await self._get_client().post(
+                    self.api_url,
+                    headers={
+                        "Authorization": f"Bearer {self.api_key}",
+                        "Content-Type": "application/json",
+                    },
+                    json={
+                        "model": self.model,
+                        "messages": [{"role": "user", "content": prompt}],
+                        "temperature": 0.1,  # Low temperature for deterministic matching
+                        "max_tokens": max_tokens,
+                        "response_format": {"type": "json_object"},
+                    },
+                )
+                response.raise_for_status()
+                break
+
+            except (httpx.TimeoutException, httpx.HTTPStatusError) as e:
+                retryable = isinstance(e, httpx.TimeoutException) or (
+                    e.response.status_code == 429 or e.response.status_code >= 500
+                )
+                if not retryable or attempt == self.API_MAX_ATTEMPTS:
+                    raise
+
+                delay = min(
+                    self.API_BACKOFF_BASE_SECONDS * (2 ** (attempt - 1)),
+                    self.API_BACKOFF_MAX_SECONDS,
+                )
+                logger.warning(
+                    f"Deepseek call failed (attempt {attempt}/{self.API_MAX_ATTEMPTS}): {e}, "
+                    f"retrying in {delay:.1f}s"
+                )
+                await asyncio.sleep(delay)
+
+        data = response.json()
 
-            if not data.get("choices"):
-                raise ValueError("No response from Deepseek API")
+        if not data.get("choices"):
+            raise ValueError("No response from Deepseek API")
 
-            content = data["choices"][0]["message"]["content"]
-            return content
+        content = data["choices"][0]["message"]["content"]
+        return content
+
+    def _strip_code_fences(self, response: str) -> str:
+        """Remove markdown code blocks if present"""
+        if "```json" in response:
+            return response.split("```json")[1].split("```")[0].strip()
+        elif "```" in response:
+            return response.split("```")[1].split("```")[0].strip()
+        return response
 
     def _parse_matching_response(self, response: str) -> Dict[str, Any]:
         """Parse the JSON response from Deepseek"""
 
         try:
-            # Remove markdown code blocks if present
-            if "```json" in response:
-                response = response.split("```json")[1].split("```")[0].strip()
-            elif "```" in response:
-                response = response.split("```")[1].split("```")[0].strip()
-
+            response = self._strip_code_fences(response)
             result = json.loads(response)
 
             # Validate required fields
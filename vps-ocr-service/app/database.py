@@ -1,15 +1,469 @@
 """Database connection and operations"""
 
+import aiohttp
+import asyncio
 import asyncpg
-from typing import Optional, Dict, Any, List
+import io
+import orjson
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from datetime import date
+from typing import Optional, Dict, Any, List, Tuple, Callable, AsyncIterator
 from loguru import logger
 from app.config import settings
 
 
+_SQL_GET_NEXT_OCR_JOB = "SELECT * FROM get_next_ocr_job($1)"
+
+_SQL_UPDATE_OCR_JOB_STATUS = "SELECT update_ocr_job_status($1, $2, $3)"
+
+_SQL_SAVE_OCR_RESULT = """
+    UPDATE documents
+    SET ocr_text = $1,
+        ocr_status = 'completed',
+        ocr_processed_at = NOW()
+    WHERE id = $2
+"""
+
+# Saves OCR text and completes the queue entry in one statement. The ocr_queue
+# half mirrors update_ocr_job_status(queue_id, 'completed').
+_SQL_COMPLETE_OCR_JOB = """
+    WITH saved AS (
+        UPDATE documents
+        SET ocr_text = $1,
+            ocr_status = 'completed',
+            ocr_processed_at = NOW()
+        WHERE id = $2
+    )
+    UPDATE ocr_queue
+    SET status = 'completed',
+        completed_at = NOW(),
+        error_message = NULL,
+        updated_at = NOW()
+    WHERE id = $3
+"""
+
+_SQL_GET_DOCUMENT_USER_ID = "SELECT user_id FROM documents WHERE id = $1"
+
+# Status counts come from the trigger-maintained ocr_queue_stats table;
+# completed_today is a range scan on ocr_queue_completed_at_idx
+_SQL_QUEUE_STATS = """
+    SELECT
+        COALESCE(SUM(cnt) FILTER (WHERE status = 'queued'), 0)::bigint AS queued,
+        COALESCE(SUM(cnt) FILTER (WHERE status = 'processing'), 0)::bigint AS processing,
+        (
+            SELECT COUNT(*)
+            FROM ocr_queue
+            WHERE status = 'completed'
+            AND completed_at > NOW() - INTERVAL '24 hours'
+        ) AS completed_today,
+        COALESCE(SUM(cnt) FILTER (WHERE status = 'failed'), 0)::bigint AS failed
+    FROM ocr_queue_stats
+"""
+
+_SQL_CLAIM_AI_LABELING_JOBS = """
+    WITH claimed AS (
+        UPDATE ai_labeling_queue
+        SET status = 'processing',
+            processing_started_at = NOW()
+        WHERE id IN (
+            SELECT id
+            FROM ai_labeling_queue
+            WHERE status = 'pending'
+            ORDER BY created_at ASC
+            LIMIT $1
+            FOR UPDATE SKIP LOCKED
+        )
+        RETURNING id, document_id, user_id, trigger_type, created_at
+    )
+    SELECT
+        c.id as queue_id,
+        c.document_id,
+        c.user_id,
+        c.trigger_type,
+        d.ocr_text
+    FROM claimed c
+    JOIN documents d ON d.id = c.document_id
+    ORDER BY c.created_at ASC
+"""
+
+_SQL_RELEASE_AI_LABELING_JOBS = """
+    UPDATE ai_labeling_queue
+    SET status = 'pending',
+        processing_started_at = NULL
+    WHERE id = ANY($1::uuid[])
+    AND status = 'processing'
+"""
+
+_SQL_UPDATE_AI_JOB_COMPLETED = """
+    UPDATE ai_labeling_queue
+    SET status = $1,
+        completed_at = NOW(),
+        error_message = NULL
+    WHERE id = $2
+"""
+
+_SQL_UPDATE_AI_JOB_FAILED = """
+    UPDATE ai_labeling_queue
+    SET status = $1,
+        error_message = $2,
+        retry_count = retry_count + 1
+    WHERE id = $3
+"""
+
+_SQL_UPDATE_AI_JOB_STATUS = """
+    UPDATE ai_labeling_queue
+    SET status = $1
+    WHERE id = $2
+"""
+
+# Fixed-shape update for AI labeling results: NULL parameters keep the
+# existing column value, so only non-null fields are written.
+# ai_processed_at is NOT set here - see complete_ai_labeling_job()
+_SQL_SAVE_AI_LABELING_RESULT = """
+    UPDATE documents
+    SET category = COALESCE($1, category),
+        extracted_names = COALESCE($2, extracted_names),
+        document_date = COALESCE($3, document_date),
+        due_date = COALESCE($4, due_date),
+        description = COALESCE($5, description),
+        has_signature = COALESCE($6, has_signature),
+        importance_score = COALESCE($7, importance_score),
+        ai_metadata = COALESCE($8::jsonb, ai_metadata),
+        ai_confidence = COALESCE($9, ai_confidence)
+    WHERE id = $10
+"""
+
+# Final write of an AI labeling job: links matched contacts (appending only
+# IDs not already present), sets ai_processed_at and completes the queue
+# entry, touching the documents row once
+_SQL_COMPLETE_AI_LABELING_JOB = """
+    WITH doc AS (
+        UPDATE documents
+        SET ai_processed_at = NOW(),
+            related_contact_ids = COALESCE(related_contact_ids, ARRAY[]::uuid[]) || ARRAY(
+                SELECT DISTINCT new_id
+                FROM unnest($2::uuid[]) AS new_id
+                WHERE related_contact_ids IS NULL
+                OR NOT (related_contact_ids @> ARRAY[new_id])
+            )
+        WHERE id = $1
+    )
+    UPDATE ai_labeling_queue
+    SET status = 'completed',
+        completed_at = NOW(),
+        error_message = NULL
+    WHERE id = $3
+"""
+
+_SQL_CREATE_AI_LABELING_JOB = """
+    INSERT INTO ai_labeling_queue (document_id, user_id, trigger_type)
+    VALUES ($1, $2, $3)
+    ON CONFLICT (document_id) WHERE status IN ('pending', 'processing')
+    DO NOTHING
+    RETURNING id
+"""
+
+_SQL_SEARCH_CONTACTS = """
+    SELECT
+        id,
+        first_name,
+        last_name,
+        email,
+        phone,
+        company,
+        job_title,
+        address_city,
+        address_state,
+        date_of_birth,
+        place_of_birth,
+        name_norm
+    FROM contacts
+    WHERE user_id = $1
+    AND (
+        lower(immutable_unaccent($2)) <% name_norm
+        OR email % $2
+    )
+    ORDER BY
+        word_similarity(lower(immutable_unaccent($2)), name_norm) DESC,
+        created_at DESC
+    LIMIT $3
+"""
+
+# A NULL status list disables the status filter
+_SQL_IMPORT_ROWS_FOR_PROCESSING = """
+    SELECT
+        id, row_number, raw_data, mapped_data,
+        status, matched_contact_id, match_confidence,
+        conflicts, decision, overwrite_fields
+    FROM contact_import_rows
+    WHERE job_id = $1
+    AND ($2::contact_import_row_status[] IS NULL OR status = ANY($2))
+    AND (decision IS NULL OR decision != 'skip')
+    ORDER BY row_number ASC
+"""
+
+# Contact columns writable by the import pipeline, in parameter order
+_CONTACT_FIELDS = [
+    "first_name", "last_name", "email", "phone",
+    "company", "job_title", "profile_picture_url",
+    "address_street", "address_city", "address_state",
+    "address_zip", "address_country", "status", "source",
+    "tags", "budget_min", "budget_max", "notes",
+    "custom_fields", "category", "role",
+    "date_of_birth", "place_of_birth"
+]
+
+# Fields update_contact() may change (status/category/role are never overwritten)
+_CONTACT_UPDATE_FIELDS = [
+    "first_name", "last_name", "email", "phone",
+    "company", "job_title", "profile_picture_url",
+    "address_street", "address_city", "address_state",
+    "address_zip", "address_country", "source",
+    "tags", "budget_min", "budget_max", "notes",
+    "custom_fields", "date_of_birth", "place_of_birth"
+]
+
+# Non-text contact columns; used for parameter casts and emptiness checks
+_CONTACT_FIELD_TYPES = {
+    "tags": "text[]",
+    "budget_min": "numeric",
+    "budget_max": "numeric",
+    "custom_fields": "jsonb",
+    "date_of_birth": "date",
+}
+
+# Table defaults, applied when a field is absent (a NULL parameter would
+# otherwise override them)
+_CONTACT_COLUMN_DEFAULTS = {
+    "address_country": "'US'",
+    "status": "'lead'",
+    "tags": "'{}'",
+    "custom_fields": "'{}'",
+}
+
+
+def _contact_param(field: str, num: int) -> str:
+    """Typed placeholder for a contact field"""
+    return f"${num}::{_CONTACT_FIELD_TYPES.get(field, 'text')}"
+
+
+def _coerce_contact_value(field: str, value: Any) -> Any:
+    """Convert an import value to what the contacts column expects"""
+    if value is None:
+        return None
+    if field == "custom_fields" and isinstance(value, str):
+        # jsonb parameters are encoded from objects (see _init_connection)
+        return orjson.loads(value)
+    if field == "date_of_birth" and isinstance(value, str):
+        return date.fromisoformat(value)
+    if field in ["budget_min", "budget_max"]:
+        return float(value) if value else None
+    return value
+
+
+# Fixed-shape single contact insert: $1 is user_id, then one parameter per
+# _CONTACT_FIELDS entry
+_SQL_CREATE_CONTACT = """
+    INSERT INTO contacts (user_id, {columns})
+    VALUES ($1, {values})
+    RETURNING id
+""".format(
+    columns=", ".join(_CONTACT_FIELDS),
+    values=", ".join(
+        f"COALESCE({_contact_param(field, i)}, {_CONTACT_COLUMN_DEFAULTS[field]})"
+        if field in _CONTACT_COLUMN_DEFAULTS
+        else _contact_param(field, i)
+        for i, field in enumerate(_CONTACT_FIELDS, start=2)
+    ),
+)
+
+
+def _contact_update_clause(field: str, num: int, flag_num: int) -> str:
+    """
+    SET clause for one field of _SQL_UPDATE_CONTACT
+
+    A NULL parameter keeps the current value; when the only-empty flag is
+    set, a non-empty current value is kept too
+    """
+    param = _contact_param(field, num)
+    if field in _CONTACT_FIELD_TYPES:
+        has_value = f"{field} IS NOT NULL"
+    else:
+        has_value = f"NULLIF({field}, '') IS NOT NULL"
+    return (
+        f"{field} = CASE WHEN {param} IS NULL OR (${flag_num}::boolean AND {has_value}) "
+        f"THEN {field} ELSE {param} END"
+    )
+
+
+# Fixed-shape contact update: one parameter per _CONTACT_UPDATE_FIELDS entry,
+# then the only-empty-fields flag, then the contact id
+_SQL_UPDATE_CONTACT = """
+    UPDATE contacts
+    SET {clauses},
+        updated_at = NOW()
+    WHERE id = ${id_num}
+""".format(
+    clauses=",\n        ".join(
+        _contact_update_clause(field, i, len(_CONTACT_UPDATE_FIELDS) + 1)
+        for i, field in enumerate(_CONTACT_UPDATE_FIELDS, start=1)
+    ),
+    id_num=len(_CONTACT_UPDATE_FIELDS) + 2,
+)
+
+# Bulk contact insert from a JSON array of normalized records. Absent fields
+# arrive as NULL, so columns with table defaults are COALESCEd to them
+_SQL_CREATE_CONTACTS_BULK = """
+    INSERT INTO contacts (
+        id, user_id, first_name, last_name, email, phone,
+        company, job_title, profile_picture_url,
+        address_street, address_city, address_state,
+        address_zip, address_country, status, source,
+        tags, budget_min, budget_max, notes,
+        custom_fields, category, role,
+        date_of_birth, place_of_birth
+    )
+    SELECT
+        r.id, $1, r.first_name, r.last_name, r.email, r.phone,
+        r.company, r.job_title, r.profile_picture_url,
+        r.address_street, r.address_city, r.address_state,
+        r.address_zip, COALESCE(r.address_country, 'US'), COALESCE(r.status, 'lead'), r.source,
+        COALESCE(r.tags, '{}'), r.budget_min, r.budget_max, r.notes,
+        COALESCE(r.custom_fields, '{}'), r.category, r.role,
+        r.date_of_birth, r.place_of_birth
+    FROM jsonb_to_recordset($2::jsonb) AS r(
+        id uuid, first_name text, last_name text, email text, phone text,
+        company text, job_title text, profile_picture_url text,
+        address_street text, address_city text, address_state text,
+        address_zip text, address_country text, status text, source text,
+        tags text[], budget_min numeric, budget_max numeric, notes text,
+        custom_fields jsonb, category text, role text,
+        date_of_birth date, place_of_birth text
+    )
+"""
+
+_SQL_UPDATE_IMPORT_ROW_RESULTS = """
+    UPDATE contact_import_rows r
+    SET status = v.status::contact_import_row_status,
+        created_contact_id = v.created_contact_id,
+        import_error = v.import_error
+    FROM unnest($1::uuid[], $2::text[], $3::uuid[], $4::text[])
+        AS v(id, status, created_contact_id, import_error)
+    WHERE r.id = v.id
+"""
+
+# Existing contacts that could match a batch of import rows by email, phone
+# or full name. Each predicate matches an expression index from
+# 20251218_contacts_import_match_idx.sql
+_SQL_FIND_MATCHING_CONTACTS = """
+    SELECT
+        id, first_name, last_name, email, phone,
+        company, job_title, address_street, address_city,
+        address_state, address_zip, address_country,
+        notes, date_of_birth, place_of_birth
+    FROM contacts
+    WHERE user_id = $1
+    AND (
+        lower(email) = ANY($2::text[])
+        OR regexp_replace(phone, '[^0-9+]', '', 'g') = ANY($3::text[])
+        OR lower(trim(first_name || ' ' || last_name)) = ANY($4::text[])
+    )
+    ORDER BY created_at DESC
+"""
+
+_SQL_UPDATE_IMPORT_JOB_STATUS = (
+    "SELECT update_import_job_status($1, $2::contact_import_status, $3, $4::jsonb)"
+)
+
+_SQL_UPDATE_IMPORT_JOB_PROGRESS = """
+    SELECT
+        update_import_job_status($1, $2::contact_import_status, $3, $4::jsonb),
+        set_config('synchronous_commit', 'off', true)
+"""
+
+
+async def _init_connection(conn: asyncpg.Connection):
+    """
+    Per-connection setup for both pools
+
+    json/jsonb parameters are passed as Python objects and encoded by orjson;
+    jsonb goes over the binary protocol (version byte + JSON text) so the
+    server skips the text input path. uuid values arrive as str (the form
+    every caller and model uses) instead of UUID objects; the codec stays
+    binary because COPY (copy_records_to_table) needs a binary encoder for
+    every column
+    """
+    await conn.set_type_codec(
+        "uuid",
+        encoder=lambda value: uuid.UUID(str(value)).bytes,
+        decoder=lambda data: str(uuid.UUID(bytes=data)),
+        schema="pg_catalog",
+        format="binary",
+    )
+    await conn.set_type_codec(
+        "jsonb",
+        encoder=lambda value: b"\x01" + orjson.dumps(value),
+        decoder=lambda data: orjson.loads(data[1:]),
+        schema="pg_catalog",
+        format="binary",
+    )
+    await conn.set_type_codec(
+        "json",
+        encoder=lambda value: orjson.dumps(value).decode(),
+        decoder=orjson.loads,
+        schema="pg_catalog",
+        format="text",
+    )
+
+
+# Indexes hot queries rely on, checked once at startup
+_REQUIRED_INDEXES = {
+    # ON CONFLICT (document_id) WHERE status IN ('pending', 'processing')
+    # fails outright without this partial unique index
+    "ai_labeling_queue_document_pending_idx": "create_ai_labeling_job",
+    "ai_labeling_queue_pending_idx": "get_next_ai_labeling_jobs",
+    "ocr_queue_claimable_idx": "get_next_ocr_job",
+    "contacts_name_norm_trgm_idx": "search_contacts_by_name",
+}
+
+
+@dataclass(frozen=True, slots=True)
+class QueueCounts:
+    """OCR queue counts (immutable, since one instance is shared by the cache)"""
+
+    queued: int = 0
+    processing: int = 0
+    completed_today: int = 0
+    failed: int = 0
+
+
 class Database:
     """PostgreSQL database operations"""
 
     _pool: Optional[asyncpg.Pool] = None
+    _pool_direct: Optional[asyncpg.Pool] = None
+    _listen_conn: Optional[asyncpg.Connection] = None
+    # channel -> callbacks, re-subscribed whenever the listener reconnects
+    _listen_callbacks: Dict[str, List[Callable[[], None]]] = {}
+    _listen_reconnect_task: Optional[asyncio.Task] = None
+    LISTEN_RECONNECT_MAX_DELAY_SECONDS = 60
+    _http: Optional[aiohttp.ClientSession] = None
+
+    # document_id -> user_id never changes, so lookups are cached for the
+    # lifetime of the process (LRU, size-bounded)
+    DOCUMENT_USER_ID_CACHE_SIZE = 4096
+    _document_user_ids: "OrderedDict[str, str]" = OrderedDict()
+
+    # /health and /api/queue/stats can be probed several times a second;
+    # stats are reused for a short TTL and concurrent refreshes share one query
+    QUEUE_STATS_TTL_SECONDS = 1.0
+    _queue_stats: Optional[QueueCounts] = None
+    _queue_stats_at: float = 0.0
+    _queue_stats_lock = asyncio.Lock()
 
     @classmethod
     async def connect(cls):
@@ -17,40 +471,232 @@ class Database:
         try:
             cls._pool = await asyncpg.create_pool(
                 settings.database_url,
-                min_size=1,
-                max_size=5,
+                min_size=settings.db_pool_min_size,
+                max_size=settings.db_pool_max_size,
                 command_timeout=60,
                 statement_cache_size=0,  # Disable for Supabase pgbouncer compatibility
+                max_inactive_connection_lifetime=300,
+                init=_init_connection,
+                # pgbouncer only forwards a few startup parameters, so no GUCs here
+                server_settings={"application_name": "vps-ocr-service"},
             )
             logger.info("✅ Database connection pool created (statement caching disabled for pgbouncer)")
+
+            # Hot worker paths (queue claims, status updates, result saves) go
+            # through a direct connection where prepared statements can be cached
+            if settings.database_direct_url:
+                cls._pool_direct = await asyncpg.create_pool(
+                    settings.database_direct_url,
+                    min_size=settings.db_direct_pool_min_size,
+                    max_size=settings.db_direct_pool_max_size,
+                    command_timeout=60,
+                    statement_cache_size=1024,
+                    max_inactive_connection_lifetime=300,
+                    init=_init_connection,
+                    # Worker queries are short OLTP statements: skip JIT startup
+                    # and reuse generic plans from the statement cache
+                    server_settings={
+                        "application_name": "vps-ocr-service",
+                        "jit": "off",
+                        "plan_cache_mode": "force_generic_plan",
+                    },
+                )
+                logger.info(
+                    "✅ Direct database pool created "
+                    "(statement caching enabled, jit=off, plan_cache_mode=force_generic_plan)"
+                )
         except Exception as e:
             logger.error(f"❌ Failed to connect to database: {e}")
             raise
 
+        await cls._check_required_indexes()
+
+    @classmethod
+    async def _check_required_indexes(cls):
+        """Warn at startup if an index that a hot query depends on is missing"""
+        try:
+            async with cls._pool.acquire(timeout=settings.db_acquire_timeout_seconds) as conn:
+                present = {
+                    row["indexname"]
+                    for row in await conn.fetch(
+                        "SELECT indexname FROM pg_indexes WHERE indexname = ANY($1::text[])",
+                        list(_REQUIRED_INDEXES),
+                    )
+                }
+        except Exception as e:
+            logger.warning(f"Could not verify required indexes: {e}")
+            return
+
+        for index_name, used_by in _REQUIRED_INDEXES.items():
+            if index_name not in present:
+                logger.warning(f"⚠️ Missing index {index_name} (needed by {used_by})")
+
     @classmethod
     async def disconnect(cls):
         """Close database connection pool"""
+        if cls._listen_reconnect_task:
+            cls._listen_reconnect_task.cancel()
+            cls._listen_reconnect_task = None
+
+        if cls._listen_conn:
+            # Cleared first so the termination listener sees a deliberate close
+            listen_conn, cls._listen_conn = cls._listen_conn, None
+            await listen_conn.close()
+            logger.info("Database listener connection closed")
+        cls._listen_callbacks = {}
+
+        if cls._http is not None:
+            await cls._http.close()
+            cls._http = None
+
+        if cls._pool_direct:
+            await cls._pool_direct.close()
+            cls._pool_direct = None
+            logger.info("Direct database pool closed")
+
         if cls._pool:
             await cls._pool.close()
             logger.info("Database connection pool closed")
 
     @classmethod
-    async def get_next_ocr_job(cls, vps_instance_id: str) -> Optional[Dict[str, Any]]:
-        """Get next OCR job from queue using database function"""
-        if not cls._pool:
+    def _get_http_session(cls) -> aiohttp.ClientSession:
+        """Get the shared Storage HTTP session (created on first use)"""
+        if cls._http is None or cls._http.closed:
+            cls._http = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=64, ttl_dns_cache=300, keepalive_timeout=60
+                ),
+                timeout=aiohttp.ClientTimeout(total=60),
+            )
+        return cls._http
+
+    @classmethod
+    def _get_worker_pool(cls) -> asyncpg.Pool:
+        """Pool for hot worker-path queries (direct pool when configured)"""
+        pool = cls._pool_direct or cls._pool
+        if not pool:
             raise RuntimeError("Database not connected")
+        return pool
+
+    @classmethod
+    @asynccontextmanager
+    async def _worker_connection(cls):
+        """Acquire a worker-pool connection"""
+        async with cls._get_worker_pool().acquire(
+            timeout=settings.db_acquire_timeout_seconds
+        ) as conn:
+            yield conn
+
+    @classmethod
+    async def listen_for_jobs(cls, channel: str, callback: Callable[[], None]) -> bool:
+        """
+        Subscribe to a NOTIFY channel on a dedicated long-lived connection
+
+        The callback is invoked (without arguments) on every notification.
+        Requires DATABASE_DIRECT_URL, since pgbouncer in transaction mode
+        cannot deliver notifications.
+
+        Returns:
+            True if listening, False if pollers should keep interval polling
+        """
+        if not settings.database_direct_url:
+            return False
+
+        try:
+            if cls._listen_conn is None or cls._listen_conn.is_closed():
+                await cls._open_listen_conn()
+
+            await cls._listen_conn.add_listener(
+                channel, lambda conn, pid, chan, payload: callback()
+            )
+            cls._listen_callbacks.setdefault(channel, []).append(callback)
+            logger.info(f"✅ Listening for notifications on '{channel}'")
+            return True
 
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to listen on '{channel}', falling back to polling: {e}")
+            return False
+
+    @classmethod
+    async def _open_listen_conn(cls):
+        """Open the listener connection and subscribe every registered channel"""
+        conn = await asyncpg.connect(settings.database_direct_url)
         try:
-            async with cls._pool.acquire() as conn:
+            for channel, callbacks in cls._listen_callbacks.items():
+                for callback in callbacks:
+                    await conn.add_listener(
+                        channel,
+                        lambda c, pid, chan, payload, callback=callback: callback(),
+                    )
+        except BaseException:
+            await conn.close()
+            raise
+        conn.add_termination_listener(cls._on_listen_conn_lost)
+        cls._listen_conn = conn
+
+    @classmethod
+    def is_listening(cls) -> bool:
+        """Whether the NOTIFY listener connection is currently up"""
+        return cls._listen_conn is not None and not cls._listen_conn.is_closed()
+
+    @classmethod
+    def _on_listen_conn_lost(cls, conn: asyncpg.Connection):
+        """Termination listener: reconnect unless the close was deliberate"""
+        if conn is not cls._listen_conn:
+            return
+
+        cls._listen_conn = None
+        logger.warning(
+            "⚠️ Database listener connection lost, pollers fall back to "
+            "POLL_INTERVAL_SECONDS until it reconnects"
+        )
+        if cls._listen_reconnect_task is None or cls._listen_reconnect_task.done():
+            cls._listen_reconnect_task = asyncio.create_task(cls._reconnect_listener())
+
+        # Wake the pollers so they leave their long safety-net wait now
+        for callbacks in cls._listen_callbacks.values():
+            for callback in callbacks:
+                callback()
+
+    @classmethod
+    async def _reconnect_listener(cls):
+        """Re-open the listener connection with exponential backoff"""
+        delay = 1
+        while cls._listen_conn is None:
+            await asyncio.sleep(delay)
+            try:
+                await cls._open_listen_conn()
+            except Exception as e:
+                logger.warning(f"⚠️ Listener reconnect failed, retrying in {delay}s: {e}")
+                delay = min(delay * 2, cls.LISTEN_RECONNECT_MAX_DELAY_SECONDS)
+                continue
+
+            logger.info(
+                f"✅ Listener reconnected ({', '.join(cls._listen_callbacks)})"
+            )
+            # Jobs queued while disconnected sent no notification; wake the
+            # pollers once so they check
+            for callbacks in cls._listen_callbacks.values():
+                for callback in callbacks:
+                    callback()
+
+    @classmethod
+    async def get_next_ocr_job(cls, vps_instance_id: str) -> Optional[asyncpg.Record]:
+        """
+        Get next OCR job from queue using database function
+
+        Returns queue_id, document_id, file_url, file_type and the document's
+        user_id, so callers don't need a separate get_document_user_id lookup.
+        The claim relies on the queued/retrying partial index
+        ocr_queue_claimable_idx
+        """
+        try:
+            async with cls._worker_connection() as conn:
                 # Call the PostgreSQL function
-                row = await conn.fetchrow(
-                    "SELECT * FROM get_next_ocr_job($1)", vps_instance_id
+                return await conn.fetchrow(
+                    _SQL_GET_NEXT_OCR_JOB, vps_instance_id
                 )
 
-                if row:
-                    return dict(row)
-                return None
-
         except Exception as e:
             logger.error(f"Failed to get next job: {e}")
             return None
@@ -60,13 +706,10 @@ class Database:
         cls, queue_id: str, status: str, error_message: Optional[str] = None
     ):
         """Update OCR job status"""
-        if not cls._pool:
-            raise RuntimeError("Database not connected")
-
         try:
-            async with cls._pool.acquire() as conn:
+            async with cls._worker_connection() as conn:
                 await conn.execute(
-                    "SELECT update_ocr_job_status($1, $2, $3)",
+                    _SQL_UPDATE_OCR_JOB_STATUS,
                     queue_id,
                     status,
                     error_message,
@@ -78,20 +721,11 @@ class Database:
     @classmethod
     async def save_ocr_result(cls, document_id: str, ocr_text: str):
         """Save OCR text to database (embeddings removed)"""
-        if not cls._pool:
-            raise RuntimeError("Database not connected")
-
         try:
-            async with cls._pool.acquire() as conn:
+            async with cls._worker_connection() as conn:
                 # Update document with OCR text
                 await conn.execute(
-                    """
-                    UPDATE documents
-                    SET ocr_text = $1,
-                        ocr_status = 'completed',
-                        ocr_processed_at = NOW()
-                    WHERE id = $2
-                    """,
+                    _SQL_SAVE_OCR_RESULT,
                     ocr_text,
                     document_id,
                 )
@@ -102,152 +736,161 @@ class Database:
             logger.error(f"Failed to save OCR result: {e}")
             raise
 
+    @classmethod
+    async def complete_ocr_job(cls, queue_id: str, document_id: str, ocr_text: str):
+        """
+        Save OCR text and mark the queue entry completed
+
+        Same effect as save_ocr_result() followed by update_ocr_job_status(),
+        but as a single statement (one round-trip, atomic).
+        """
+        try:
+            async with cls._worker_connection() as conn:
+                await conn.execute(_SQL_COMPLETE_OCR_JOB, ocr_text, document_id, queue_id)
+
+            logger.info(f"✅ Saved OCR result for document {document_id}")
+
+        except Exception as e:
+            logger.error(f"Failed to complete OCR job: {e}")
+            raise
+
     @classmethod
     async def get_document_user_id(cls, document_id: str) -> Optional[str]:
-        """Get user_id for a document"""
-        if not cls._pool:
-            raise RuntimeError("Database not connected")
+        """Get user_id for a document (cached in-process)"""
+        cached = cls._document_user_ids.get(document_id)
+        if cached is not None:
+            cls._document_user_ids.move_to_end(document_id)
+            return cached
 
         try:
-            async with cls._pool.acquire() as conn:
+            async with cls._worker_connection() as conn:
                 row = await conn.fetchrow(
-                    "SELECT user_id FROM documents WHERE id = $1", document_id
+                    _SQL_GET_DOCUMENT_USER_ID, document_id
                 )
-                return row["user_id"] if row else None
+                if not row:
+                    return None
+
+            user_id = str(row["user_id"])
+            cls._document_user_ids[document_id] = user_id
+            if len(cls._document_user_ids) > cls.DOCUMENT_USER_ID_CACHE_SIZE:
+                cls._document_user_ids.popitem(last=False)
+            return user_id
         except Exception as e:
             logger.error(f"Failed to get document user_id: {e}")
             return None
 
     @classmethod
-    async def get_queue_stats(cls) -> Dict[str, int]:
-        """Get queue statistics"""
+    async def get_queue_stats(cls) -> QueueCounts:
+        """Get queue statistics (cached for QUEUE_STATS_TTL_SECONDS)"""
         if not cls._pool:
             raise RuntimeError("Database not connected")
 
+        if cls._queue_stats is not None and (
+            time.monotonic() - cls._queue_stats_at < cls.QUEUE_STATS_TTL_SECONDS
+        ):
+            return cls._queue_stats
+
+        async with cls._queue_stats_lock:
+            # Another caller may have refreshed while we waited
+            if cls._queue_stats is not None and (
+                time.monotonic() - cls._queue_stats_at < cls.QUEUE_STATS_TTL_SECONDS
+            ):
+                return cls._queue_stats
+
+            stats = await cls._fetch_queue_stats()
+            if stats is not None:
+                cls._queue_stats = stats
+                cls._queue_stats_at = time.monotonic()
+                return stats
+
+        return QueueCounts()
+
+    @classmethod
+    async def _fetch_queue_stats(cls) -> Optional[QueueCounts]:
+        """Read queue statistics from the database (None on failure)"""
         try:
-            async with cls._pool.acquire() as conn:
-                queued = await conn.fetchval(
-                    "SELECT COUNT(*) FROM ocr_queue WHERE status = 'queued'"
-                )
-                processing = await conn.fetchval(
-                    "SELECT COUNT(*) FROM ocr_queue WHERE status = 'processing'"
-                )
-                completed_today = await conn.fetchval(
-                    """
-                    SELECT COUNT(*) FROM ocr_queue
-                    WHERE status = 'completed'
-                    AND completed_at > NOW() - INTERVAL '24 hours'
-                    """
-                )
-                failed = await conn.fetchval(
-                    "SELECT COUNT(*) FROM ocr_queue WHERE status = 'failed'"
+            async with cls._pool.acquire(timeout=settings.db_acquire_timeout_seconds) as conn:
+                # Counter lookup, one round-trip
+                row = await conn.fetchrow(
+                    _SQL_QUEUE_STATS
                 )
 
-                return {
-                    "queued": queued or 0,
-                    "processing": processing or 0,
-                    "completed_today": completed_today or 0,
-                    "failed": failed or 0,
-                }
+                return QueueCounts(
+                    queued=row["queued"] or 0,
+                    processing=row["processing"] or 0,
+                    completed_today=row["completed_today"] or 0,
+                    failed=row["failed"] or 0,
+                )
         except Exception as e:
             logger.error(f"Failed to get queue stats: {e}")
-            return {"queued": 0, "processing": 0, "completed_today": 0, "failed": 0}
+            return None
 
     # ==================== AI LABELING QUEUE METHODS ====================
 
     @classmethod
-    async def get_next_ai_labeling_job(cls, vps_instance_id: str) -> Optional[Dict[str, Any]]:
-        """
-        Get next AI labeling job from queue
+    async def get_next_ai_labeling_job(cls, vps_instance_id: str) -> Optional[asyncpg.Record]:
+        """Get next AI labeling job from queue (see get_next_ai_labeling_jobs)"""
+        jobs = await cls.get_next_ai_labeling_jobs(vps_instance_id, batch_size=1)
+        return jobs[0] if jobs else None
 
-        Uses row-level locking to prevent duplicate processing
+    @classmethod
+    async def get_next_ai_labeling_jobs(
+        cls, vps_instance_id: str, batch_size: int
+    ) -> List[asyncpg.Record]:
         """
-        if not cls._pool:
-            raise RuntimeError("Database not connected")
+        Claim up to batch_size AI labeling jobs from queue, oldest first
 
+        Claims in a single statement: the inner SELECT uses row-level locking
+        (SKIP LOCKED) to prevent duplicate processing and the UPDATE marks the
+        rows as processing in the same round-trip. Relies on the pending-only
+        partial index ai_labeling_queue_pending_idx
+        """
         try:
-            async with cls._pool.acquire() as conn:
-                async with conn.transaction():
-                    # Find oldest pending job and lock it
-                    row = await conn.fetchrow(
-                        """
-                        SELECT
-                            q.id as queue_id,
-                            q.document_id,
-                            q.user_id,
-                            q.trigger_type,
-                            d.ocr_text
-                        FROM ai_labeling_queue q
-                        JOIN documents d ON d.id = q.document_id
-                        WHERE q.status = 'pending'
-                        ORDER BY q.created_at ASC
-                        LIMIT 1
-                        FOR UPDATE SKIP LOCKED
-                        """
-                    )
+            async with cls._worker_connection() as conn:
+                return await conn.fetch(_SQL_CLAIM_AI_LABELING_JOBS, batch_size)
 
-                    if not row:
-                        return None
+        except Exception as e:
+            logger.error(f"Failed to get next AI labeling jobs: {e}")
+            return []
 
-                    # Update status to processing
-                    await conn.execute(
-                        """
-                        UPDATE ai_labeling_queue
-                        SET status = 'processing',
-                            processing_started_at = NOW()
-                        WHERE id = $1
-                        """,
-                        row["queue_id"],
-                    )
+    @classmethod
+    async def release_ai_labeling_jobs(cls, queue_ids: List[str]):
+        """Put claimed but unstarted AI labeling jobs back to pending"""
+        if not queue_ids:
+            return
+
+        try:
+            async with cls._worker_connection() as conn:
+                await conn.execute(_SQL_RELEASE_AI_LABELING_JOBS, queue_ids)
 
-                    return dict(row)
+            logger.info(f"Released {len(queue_ids)} unstarted AI labeling job(s)")
 
         except Exception as e:
-            logger.error(f"Failed to get next AI labeling job: {e}")
-            return None
+            logger.error(f"Failed to release AI labeling jobs: {e}")
 
     @classmethod
     async def update_ai_labeling_job_status(
         cls, queue_id: str, status: str, error_message: Optional[str] = None
     ):
         """Update AI labeling job status"""
-        if not cls._pool:
-            raise RuntimeError("Database not connected")
-
         try:
-            async with cls._pool.acquire() as conn:
+            async with cls._worker_connection() as conn:
                 if status == "completed":
                     await conn.execute(
-                        """
-                        UPDATE ai_labeling_queue
-                        SET status = $1,
-                            completed_at = NOW(),
-                            error_message = NULL
-                        WHERE id = $2
-                        """,
+                        _SQL_UPDATE_AI_JOB_COMPLETED,
                         status,
                         queue_id,
                     )
                 elif status == "failed":
                     await conn.execute(
-                        """
-                        UPDATE ai_labeling_queue
-                        SET status = $1,
-                            error_message = $2,
-                            retry_count = retry_count + 1
-                        WHERE id = $3
-                        """,
+                        _SQL_UPDATE_AI_JOB_FAILED,
                         status,
                         error_message,
                         queue_id,
                     )
                 else:
                     await conn.execute(
-                        """
-                        UPDATE ai_labeling_queue
-                        SET status = $1
-                        WHERE id = $2
-                        """,
+                        _SQL_UPDATE_AI_JOB_STATUS,
                         status,
                         queue_id,
                     )
@@ -263,87 +906,29 @@ class Database:
 
         Only updates non-null fields (as per requirements)
         """
-        if not cls._pool:
-            raise RuntimeError("Database not connected")
-
         try:
-            async with cls._pool.acquire() as conn:
-                # Build dynamic UPDATE query based on non-null fields
-                update_fields = []
-                params = []
-                param_num = 1
-
-                if metadata.get("category") is not None:
-                    update_fields.append(f"category = ${param_num}")
-                    params.append(metadata["category"])
-                    param_num += 1
-
-                if metadata.get("extracted_names") is not None:
-                    update_fields.append(f"extracted_names = ${param_num}")
-                    params.append(metadata["extracted_names"])
-                    param_num += 1
-
-                if metadata.get("document_date") is not None:
-                    # Convert string date to Python date object if needed
-                    doc_date = metadata["document_date"]
-                    if isinstance(doc_date, str):
-                        from datetime import datetime
-                        doc_date = datetime.strptime(doc_date, "%Y-%m-%d").date()
-                    update_fields.append(f"document_date = ${param_num}")
-                    params.append(doc_date)
-                    param_num += 1
-
-                if metadata.get("due_date") is not None:
-                    # Convert string date to Python date object if needed
-                    due_date = metadata["due_date"]
-                    if isinstance(due_date, str):
-                        from datetime import datetime
-                        due_date = datetime.strptime(due_date, "%Y-%m-%d").date()
-                    update_fields.append(f"due_date = ${param_num}")
-                    params.append(due_date)
-                    param_num += 1
-
-                if metadata.get("description") is not None:
-                    update_fields.append(f"description = ${param_num}")
-                    params.append(metadata["description"])
-                    param_num += 1
-
-                if metadata.get("has_signature") is not None:
-                    update_fields.append(f"has_signature = ${param_num}")
-                    params.append(metadata["has_signature"])
-                    param_num += 1
-
-                if metadata.get("importance_score") is not None:
-                    update_fields.append(f"importance_score = ${param_num}")
-                    params.append(metadata["importance_score"])
-                    param_num += 1
-
-                if metadata.get("ai_metadata") is not None:
-                    update_fields.append(f"ai_metadata = ${param_num}::jsonb")
-                    import json
-                    params.append(json.dumps(metadata["ai_metadata"]))
-                    param_num += 1
-
-                if metadata.get("ai_confidence") is not None:
-                    update_fields.append(f"ai_confidence = ${param_num}")
-                    params.append(metadata["ai_confidence"])
-                    param_num += 1
-
-                # ✨ DO NOT SET ai_processed_at HERE
-                # It will be set AFTER contact matching completes
-                # See: mark_ai_processing_complete() method
-
-                # Add document_id as last param
-                params.append(document_id)
-
-                if update_fields:
-                    query = f"""
-                        UPDATE documents
-                        SET {', '.join(update_fields)}
-                        WHERE id = ${param_num}
-                    """
+            document_date = metadata.get("document_date")
+            if isinstance(document_date, str):
+                document_date = date.fromisoformat(document_date)
+
+            due_date = metadata.get("due_date")
+            if isinstance(due_date, str):
+                due_date = date.fromisoformat(due_date)
 
-                    await conn.execute(query, *params)
+            async with cls._worker_connection() as conn:
+                await conn.execute(
+                    _SQL_SAVE_AI_LABELING_RESULT,
+                    metadata.get("category"),
+                    metadata.get("extracted_names"),
+                    document_date,
+                    due_date,
+                    metadata.get("description"),
+                    metadata.get("has_signature"),
+                    metadata.get("importance_score"),
+                    metadata.get("ai_metadata"),
+                    metadata.get("ai_confidence"),
+                    document_id,
+                )
 
             logger.info(f"✅ Saved AI labeling result for document {document_id}")
 
@@ -352,31 +937,35 @@ class Database:
             raise
 
     @classmethod
-    async def mark_ai_processing_complete(cls, document_id: str):
+    async def complete_ai_labeling_job(
+        cls, queue_id: str, document_id: str, contact_ids: Optional[List[str]] = None
+    ):
         """
-        Mark AI processing as complete (sets ai_processed_at timestamp)
+        Link matched contacts, set ai_processed_at and mark the queue entry completed
 
-        This should be called AFTER contact matching completes, so the frontend
-        knows that ALL AI processing (including contact linking) is done.
-        """
-        if not cls._pool:
-            raise RuntimeError("Database not connected")
+        One statement, so the documents row is updated once and the frontend
+        sees the links and ai_processed_at together. ai_processed_at is set
+        here, after contact matching, so the frontend knows ALL AI
+        processing (including contact linking) is done.
 
+        Args:
+            queue_id: AI labeling queue entry ID
+            document_id: Document ID
+            contact_ids: Matched contact IDs to link (duplicates are ignored)
+        """
         try:
-            async with cls._pool.acquire() as conn:
+            async with cls._worker_connection() as conn:
                 await conn.execute(
-                    """
-                    UPDATE documents
-                    SET ai_processed_at = NOW()
-                    WHERE id = $1
-                    """,
+                    _SQL_COMPLETE_AI_LABELING_JOB,
                     document_id,
+                    contact_ids or [],
+                    queue_id,
                 )
 
             logger.info(f"✅ Marked AI processing complete for document {document_id}")
 
         except Exception as e:
-            logger.error(f"Failed to mark AI processing complete: {e}")
+            logger.error(f"Failed to complete AI labeling job: {e}")
             raise
 
     @classmethod
@@ -392,15 +981,9 @@ class Database:
             raise RuntimeError("Database not connected")
 
         try:
-            async with cls._pool.acquire() as conn:
+            async with cls._pool.acquire(timeout=settings.db_acquire_timeout_seconds) as conn:
                 row = await conn.fetchrow(
-                    """
-                    INSERT INTO ai_labeling_queue (document_id, user_id, trigger_type)
-                    VALUES ($1, $2, $3)
-                    ON CONFLICT (document_id) WHERE status IN ('pending', 'processing')
-                    DO NOTHING
-                    RETURNING id
-                    """,
+                    _SQL_CREATE_AI_LABELING_JOB,
                     document_id,
                     user_id,
                     trigger_type,
@@ -420,7 +1003,7 @@ class Database:
     @classmethod
     async def search_contacts_by_name(
         cls, user_id: str, name: str, limit: int = 5
-    ) -> List[Dict[str, Any]]:
+    ) -> List[asyncpg.Record]:
         """
         Search for contacts by name (fuzzy match)
 
@@ -430,190 +1013,41 @@ class Database:
             limit: Maximum number of results to return
 
         Returns:
-            List of contact dictionaries with metadata
+            List of contact records with the fields the contact matcher
+            puts in its prompt (id, name, email, phone, company, job title,
+            city/state, birth date/place, name_norm)
         """
         if not cls._pool:
             raise RuntimeError("Database not connected")
 
         try:
-            # Split name into parts for better matching
-            name_parts = name.strip().split()
-            logger.debug(f"Searching contacts: name='{name}', parts={name_parts}, user_id={user_id[:8]}...")
-
-            async with cls._pool.acquire() as conn:
-                # Try multi-strategy search:
-                # 1. Exact full name match
-                # 2. First name + last name fuzzy match
-                # 3. Full name in either field (for single names or reversed names)
-
-                if len(name_parts) >= 2:
-                    first_term = name_parts[0]
-                    last_term = " ".join(name_parts[1:])
-
-                    rows = await conn.fetch(
-                        """
-                        SELECT
-                            id,
-                            first_name,
-                            last_name,
-                            email,
-                            phone,
-                            company,
-                            job_title,
-                            address_city,
-                            address_state,
-                            address_country,
-                            date_of_birth,
-                            place_of_birth,
-                            status,
-                            category,
-                            created_at
-                        FROM contacts
-                        WHERE user_id = $1
-                        AND (
-                            -- Exact match (both first and last)
-                            (LOWER(first_name) = LOWER($2) AND LOWER(last_name) = LOWER($3))
-                            -- Fuzzy match on first name (use OR, not AND)
-                            OR first_name ILIKE $4
-                            -- Fuzzy match on last name with remaining terms
-                            OR last_name ILIKE $5
-                            -- Full name in last_name (reversed names like "Garcia Ramirez, Alejandro")
-                            OR last_name ILIKE $6
-                            -- Full name in first_name
-                            OR first_name ILIKE $6
-                            -- Email match
-                            OR email ILIKE $6
-                            -- Phone match
-                            OR phone ILIKE $6
-                            -- Company match
-                            OR company ILIKE $6
-                        )
-                        ORDER BY
-                            -- Prioritize exact matches
-                            CASE
-                                WHEN LOWER(first_name) = LOWER($2) AND LOWER(last_name) = LOWER($3) THEN 1
-                                WHEN first_name ILIKE $4 OR last_name ILIKE $5 THEN 2
-                                ELSE 3
-                            END,
-                            created_at DESC
-                        LIMIT $7
-                        """,
-                        user_id,
-                        first_term,  # $2
-                        last_term,   # $3
-                        f"%{first_term}%",  # $4
-                        f"%{last_term}%",   # $5
-                        f"%{name}%",  # $6
-                        limit,  # $7
-                    )
-                else:
-                    # Single name - search in all text fields
-                    single_term = name_parts[0] if name_parts else name
-
-                    rows = await conn.fetch(
-                        """
-                        SELECT
-                            id,
-                            first_name,
-                            last_name,
-                            email,
-                            phone,
-                            company,
-                            job_title,
-                            address_city,
-                            address_state,
-                            address_country,
-                            date_of_birth,
-                            place_of_birth,
-                            status,
-                            category,
-                            created_at
-                        FROM contacts
-                        WHERE user_id = $1
-                        AND (
-                            first_name ILIKE $2
-                            OR last_name ILIKE $2
-                            OR email ILIKE $2
-                            OR phone ILIKE $2
-                            OR company ILIKE $2
-                        )
-                        ORDER BY
-                            -- Exact matches first
-                            CASE
-                                WHEN LOWER(first_name) = LOWER($3) OR LOWER(last_name) = LOWER($3) THEN 1
-                                ELSE 2
-                            END,
-                            created_at DESC
-                        LIMIT $4
-                        """,
-                        user_id,
-                        f"%{single_term}%",  # $2
-                        single_term,  # $3
-                        limit,  # $4
-                    )
+            name = name.strip()
+            logger.debug(f"Searching contacts: name='{name}', user_id={user_id[:8]}...")
+
+            async with cls._pool.acquire(timeout=settings.db_acquire_timeout_seconds) as conn:
+                # Trigram search (pg_trgm, GIN-indexed) on the normalized name:
+                # handles typos, accents and reversed names without ILIKE scans.
+                # name_norm is lower(immutable_unaccent(first || ' ' || last)).
+                # word_similarity (<%) covers both full names and single names,
+                # since it matches the search text against any part of name_norm
+                rows = await conn.fetch(
+                    _SQL_SEARCH_CONTACTS,
+                    user_id,
+                    name,
+                    limit,
+                )
 
-                results = [dict(row) for row in rows]
-                logger.debug(f"Contact search returned {len(results)} result(s) for '{name}'")
-                return results
+                logger.debug(f"Contact search returned {len(rows)} result(s) for '{name}'")
+                return rows
 
         except Exception as e:
             logger.error(f"Failed to search contacts by name '{name}': {e}")
             return []
 
-    @classmethod
-    async def link_contact_to_document(
-        cls, document_id: str, contact_id: str
-    ) -> bool:
-        """
-        Link a contact to a document by adding to related_contact_ids array
-
-        Args:
-            document_id: Document ID
-            contact_id: Contact ID to link
-
-        Returns:
-            True if linked successfully, False otherwise
-        """
-        if not cls._pool:
-            raise RuntimeError("Database not connected")
-
-        try:
-            async with cls._pool.acquire() as conn:
-                # Use PostgreSQL array concatenation operator ||
-                # COALESCE handles NULL arrays (converts NULL to empty array)
-                # Only add if not already present in array
-                result = await conn.execute(
-                    """
-                    UPDATE documents
-                    SET related_contact_ids = COALESCE(related_contact_ids, ARRAY[]::uuid[]) || $1::uuid
-                    WHERE id = $2
-                    AND (
-                        related_contact_ids IS NULL
-                        OR NOT ($1::uuid = ANY(related_contact_ids))
-                    )
-                    """,
-                    contact_id,
-                    document_id,
-                )
-
-                # Check if any rows were updated
-                rows_updated = int(result.split()[-1]) if result else 0
-
-                if rows_updated > 0:
-                    logger.info(f"✅ Linked contact {contact_id} to document {document_id}")
-                    return True
-                else:
-                    logger.debug(f"Contact {contact_id} already linked to document {document_id}")
-                    return True  # Still return True since contact is linked
-
-        except Exception as e:
-            logger.error(f"Failed to link contact to document: {e}")
-            return False
-
     # ==================== CONTACT IMPORT QUEUE METHODS ====================
 
     @classmethod
-    async def get_next_import_job(cls, vps_instance_id: str) -> Optional[Dict[str, Any]]:
+    async def get_next_import_job(cls, vps_instance_id: str) -> Optional[asyncpg.Record]:
         """
         Get next contact import job from queue
 
@@ -623,16 +1057,12 @@ class Database:
             raise RuntimeError("Database not connected")
 
         try:
-            async with cls._pool.acquire() as conn:
-                row = await conn.fetchrow(
+            async with cls._pool.acquire(timeout=settings.db_acquire_timeout_seconds) as conn:
+                return await conn.fetchrow(
                     "SELECT * FROM get_next_import_job($1)",
                     vps_instance_id
                 )
 
-                if row:
-                    return dict(row)
-                return None
-
         except Exception as e:
             logger.error(f"Failed to get next import job: {e}")
             return None
@@ -650,16 +1080,24 @@ class Database:
             raise RuntimeError("Database not connected")
 
         try:
-            import json
-            stats_json = json.dumps(stats) if stats else None
+            # 'processing' progress updates are rewritten as the import advances,
+            # so they skip the WAL flush wait (losing one on a crash is harmless).
+            # Other statuses are real state changes and stay durable.
+            # synchronous_commit is read at commit, so setting it locally in the
+            # same implicit transaction is enough
+            query = (
+                _SQL_UPDATE_IMPORT_JOB_PROGRESS
+                if status == "processing"
+                else _SQL_UPDATE_IMPORT_JOB_STATUS
+            )
 
-            async with cls._pool.acquire() as conn:
+            async with cls._pool.acquire(timeout=settings.db_acquire_timeout_seconds) as conn:
                 await conn.execute(
-                    "SELECT update_import_job_status($1, $2::contact_import_status, $3, $4::jsonb)",
+                    query,
                     job_id,
                     status,
                     error_message,
-                    stats_json
+                    stats or None
                 )
 
             logger.info(f"Updated import job {job_id} status to {status}")
@@ -680,9 +1118,8 @@ class Database:
             raise RuntimeError("Database not connected")
 
         try:
-            import json
 
-            async with cls._pool.acquire() as conn:
+            async with cls._pool.acquire(timeout=settings.db_acquire_timeout_seconds) as conn:
                 await conn.execute(
                     """
                     UPDATE contact_import_jobs
@@ -690,7 +1127,7 @@ class Database:
                         csv_headers = $2
                     WHERE id = $3
                     """,
-                    json.dumps(column_mapping),
+                    column_mapping,
                     csv_headers,
                     job_id
                 )
@@ -725,35 +1162,31 @@ class Database:
         if not rows:
             return
 
-        try:
-            import json
+        records = [
+            (
+                job_id,
+                row["row_number"],
+                row["raw_data"],
+                row.get("mapped_data") or None,
+                row["status"],
+                row.get("matched_contact_id"),
+                row.get("match_confidence"),
+                row.get("conflicts") or None,
+            )
+            for row in rows
+        ]
 
-            async with cls._pool.acquire() as conn:
-                # Use COPY for bulk insert (faster)
-                # But for simplicity, use executemany
-                await conn.executemany(
-                    """
-                    INSERT INTO contact_import_rows (
-                        job_id, row_number, raw_data, mapped_data,
-                        status, matched_contact_id, match_confidence, conflicts
-                    ) VALUES (
-                        $1, $2, $3::jsonb, $4::jsonb,
-                        $5::contact_import_row_status, $6, $7, $8::jsonb
-                    )
-                    """,
-                    [
-                        (
-                            job_id,
-                            row["row_number"],
-                            json.dumps(row["raw_data"]),
-                            json.dumps(row["mapped_data"]) if row.get("mapped_data") else None,
-                            row["status"],
-                            row.get("matched_contact_id"),
-                            row.get("match_confidence"),
-                            json.dumps(row["conflicts"]) if row.get("conflicts") else None
-                        )
-                        for row in rows
-                    ]
+        try:
+            async with cls._pool.acquire(timeout=settings.db_acquire_timeout_seconds) as conn:
+                # COPY streams all rows in one protocol exchange instead of
+                # one INSERT per row
+                await conn.copy_records_to_table(
+                    "contact_import_rows",
+                    records=records,
+                    columns=[
+                        "job_id", "row_number", "raw_data", "mapped_data",
+                        "status", "matched_contact_id", "match_confidence", "conflicts",
+                    ],
                 )
 
             logger.info(f"Saved {len(rows)} import rows for job {job_id}")
@@ -763,129 +1196,100 @@ class Database:
             raise
 
     @classmethod
-    async def get_import_rows_for_processing(
+    async def iter_import_rows_for_processing(
         cls,
         job_id: str,
-        include_statuses: List[str] = None
-    ) -> List[Dict[str, Any]]:
+        include_statuses: List[str] = None,
+        batch_size: int = 500
+    ) -> AsyncIterator[asyncpg.Record]:
         """
-        Get import rows ready for processing
-
-        Args:
-            job_id: Import job ID
-            include_statuses: Filter by row status (default: all non-skipped)
+        Stream import rows ready for processing
 
-        Returns:
-            List of rows with their decisions
+        Rows of the job (optionally filtered by status, skipped rows
+        excluded) are read through a server-side cursor batch_size rows at a
+        time, so large imports are never fully held in memory. The cursor
+        keeps one pooled connection (and its transaction) for as long as the
+        caller iterates.
         """
         if not cls._pool:
             raise RuntimeError("Database not connected")
 
-        try:
-            async with cls._pool.acquire() as conn:
-                if include_statuses:
-                    rows = await conn.fetch(
-                        """
-                        SELECT
-                            id, row_number, raw_data, mapped_data,
-                            status, matched_contact_id, match_confidence,
-                            conflicts, decision, overwrite_fields
-                        FROM contact_import_rows
-                        WHERE job_id = $1
-                        AND status = ANY($2::contact_import_row_status[])
-                        AND (decision IS NULL OR decision != 'skip')
-                        ORDER BY row_number ASC
-                        """,
-                        job_id,
-                        include_statuses
-                    )
-                else:
-                    rows = await conn.fetch(
-                        """
-                        SELECT
-                            id, row_number, raw_data, mapped_data,
-                            status, matched_contact_id, match_confidence,
-                            conflicts, decision, overwrite_fields
-                        FROM contact_import_rows
-                        WHERE job_id = $1
-                        AND (decision IS NULL OR decision != 'skip')
-                        ORDER BY row_number ASC
-                        """,
-                        job_id
-                    )
-
-                return [dict(row) for row in rows]
-
-        except Exception as e:
-            logger.error(f"Failed to get import rows for processing: {e}")
-            return []
+        async with cls._pool.acquire(timeout=settings.db_acquire_timeout_seconds) as conn:
+            async with conn.transaction():
+                async for row in conn.cursor(
+                    _SQL_IMPORT_ROWS_FOR_PROCESSING,
+                    job_id,
+                    include_statuses or None,
+                    prefetch=batch_size,
+                ):
+                    yield row
 
     @classmethod
-    async def update_import_row_result(
+    async def update_import_row_results(
         cls,
-        row_id: str,
-        status: str,
-        created_contact_id: Optional[str] = None,
-        error: Optional[str] = None
+        results: List[Tuple[str, str, Optional[str], Optional[str]]]
     ):
-        """Update import row after processing"""
+        """
+        Update many import rows after processing in a single UPDATE
+
+        Args:
+            results: (row_id, status, created_contact_id, error) tuples
+        """
         if not cls._pool:
             raise RuntimeError("Database not connected")
 
+        if not results:
+            return
+
         try:
-            async with cls._pool.acquire() as conn:
+            async with cls._pool.acquire(timeout=settings.db_acquire_timeout_seconds) as conn:
                 await conn.execute(
-                    """
-                    UPDATE contact_import_rows
-                    SET status = $1::contact_import_row_status,
-                        created_contact_id = $2,
-                        import_error = $3
-                    WHERE id = $4
-                    """,
-                    status,
-                    created_contact_id,
-                    error,
-                    row_id
+                    _SQL_UPDATE_IMPORT_ROW_RESULTS,
+                    [r[0] for r in results],
+                    [r[1] for r in results],
+                    [r[2] for r in results],
+                    [r[3] for r in results],
                 )
 
         except Exception as e:
-            logger.error(f"Failed to update import row result: {e}")
+            logger.error(f"Failed to update import row results: {e}")
             raise
 
     @classmethod
-    async def get_user_contacts_for_matching(
+    async def find_matching_contacts(
         cls,
-        user_id: str
-    ) -> List[Dict[str, Any]]:
+        user_id: str,
+        emails: List[str],
+        phones: List[str],
+        names: List[str]
+    ) -> List[asyncpg.Record]:
         """
-        Get all user contacts for duplicate matching
+        Get the user's contacts that match any of the given keys (newest first)
+
+        Args:
+            user_id: User ID
+            emails: Lowercased emails
+            phones: Phones normalized to digits and '+'
+            names: Lowercased "first last" names
 
-        Returns minimal contact info for efficient matching
+        Returns:
+            Matching contacts with the fields used for conflict detection
         """
         if not cls._pool:
             raise RuntimeError("Database not connected")
 
+        if not (emails or phones or names):
+            return []
+
         try:
-            async with cls._pool.acquire() as conn:
-                rows = await conn.fetch(
-                    """
-                    SELECT
-                        id, first_name, last_name, email, phone,
-                        company, job_title, address_street, address_city,
-                        address_state, address_zip, address_country,
-                        source, notes, date_of_birth, place_of_birth
-                    FROM contacts
-                    WHERE user_id = $1
-                    ORDER BY created_at DESC
-                    """,
-                    user_id
+            async with cls._pool.acquire(timeout=settings.db_acquire_timeout_seconds) as conn:
+                return await conn.fetch(
+                    _SQL_FIND_MATCHING_CONTACTS, user_id, emails, phones, names
                 )
 
-                return [dict(row) for row in rows]
-
         except Exception as e:
-            logger.error(f"Failed to get user contacts for matching: {e}")
-            return []
+            logger.error(f"Failed to find matching contacts: {e}")
+            raise
 
     @classmethod
     async def create_contact(
@@ -902,61 +1306,69 @@ class Database:
             raise RuntimeError("Database not connected")
 
         try:
-            async with cls._pool.acquire() as conn:
-                # Build dynamic INSERT based on provided fields
-                fields = ["user_id"]
-                values = [user_id]
-                placeholders = ["$1"]
-
-                contact_fields = [
-                    "first_name", "last_name", "email", "phone",
-                    "company", "job_title", "profile_picture_url",
-                    "address_street", "address_city", "address_state",
-                    "address_zip", "address_country", "status", "source",
-                    "tags", "budget_min", "budget_max", "notes",
-                    "custom_fields", "category", "role",
-                    "date_of_birth", "place_of_birth"
-                ]
-
-                param_num = 2
-                for field in contact_fields:
-                    if field in contact_data and contact_data[field] is not None:
-                        fields.append(field)
-                        value = contact_data[field]
-
-                        # Handle special types
-                        if field == "tags" and isinstance(value, list):
-                            values.append(value)
-                        elif field == "custom_fields" and isinstance(value, dict):
-                            import json
-                            values.append(json.dumps(value))
-                            placeholders.append(f"${param_num}::jsonb")
-                            param_num += 1
-                            continue
-                        elif field == "date_of_birth" and isinstance(value, str):
-                            from datetime import datetime
-                            values.append(datetime.strptime(value, "%Y-%m-%d").date())
-                        elif field in ["budget_min", "budget_max"]:
-                            values.append(float(value) if value else None)
-                        else:
-                            values.append(value)
-
-                        placeholders.append(f"${param_num}")
-                        param_num += 1
-
-                query = f"""
-                    INSERT INTO contacts ({', '.join(fields)})
-                    VALUES ({', '.join(placeholders)})
-                    RETURNING id
-                """
-
-                row = await conn.fetchrow(query, *values)
+            async with cls._pool.acquire(timeout=settings.db_acquire_timeout_seconds) as conn:
+                row = await conn.fetchrow(
+                    _SQL_CREATE_CONTACT,
+                    user_id,
+                    *(
+                        _coerce_contact_value(field, contact_data.get(field))
+                        for field in _CONTACT_FIELDS
+                    ),
+                )
                 return str(row["id"]) if row else None
 
         except Exception as e:
             logger.error(f"Failed to create contact: {e}")
             raise
 
+    @classmethod
+    async def create_contacts_bulk(
+        cls,
+        user_id: str,
+        contacts: List[Dict[str, Any]]
+    ) -> List[str]:
+        """
+        Create many contacts in a single INSERT
+
+        Accepts the same contact_data dicts as create_contact(). IDs are
+        generated here, so the result lines up with the input order.
+
+        Returns the created contact IDs
+        """
+        if not cls._pool:
+            raise RuntimeError("Database not connected")
+
+        if not contacts:
+            return []
+
+        contact_ids = [str(uuid.uuid4()) for _ in contacts]
+        records = []
+        for contact_id, contact_data in zip(contact_ids, contacts):
+            record = {"id": contact_id}
+            for field in _CONTACT_FIELDS:
+                value = contact_data.get(field)
+                if field in ["budget_min", "budget_max"]:
+                    value = float(value) if value else None
+                elif field == "date_of_birth" and isinstance(value, str):
+                    # Validate here so a bad date fails before the INSERT
+                    value = date.fromisoformat(value).isoformat()
+                record[field] = value
+            records.append(record)
+
+        try:
+            async with cls._pool.acquire(timeout=settings.db_acquire_timeout_seconds) as conn:
+                await conn.execute(
+                    _SQL_CREATE_CONTACTS_BULK,
+                    user_id,
+                    records,
+                )
+
+            return contact_ids
+
+        except Exception as e:
+            logger.error(f"Failed to create {len(contacts)} contacts: {e}")
+            raise
+
     @classmethod
     async def update_contact(
         cls,
@@ -984,70 +1396,25 @@ class Database:
             return True
 
         try:
-            async with cls._pool.acquire() as conn:
-                # Build dynamic UPDATE
-                set_clauses = []
-                values = []
-                param_num = 1
-
-                allowed_fields = [
-                    "first_name", "last_name", "email", "phone",
-                    "company", "job_title", "profile_picture_url",
-                    "address_street", "address_city", "address_state",
-                    "address_zip", "address_country", "source",
-                    "tags", "budget_min", "budget_max", "notes",
-                    "custom_fields", "date_of_birth", "place_of_birth"
-                ]
-
-                for field in allowed_fields:
-                    if field not in update_data or update_data[field] is None:
-                        continue
-
-                    # Skip if not in specific_fields list (when provided)
-                    if specific_fields and field not in specific_fields:
-                        continue
-
-                    value = update_data[field]
-
-                    # Handle special types
-                    if field == "custom_fields" and isinstance(value, dict):
-                        import json
-                        value = json.dumps(value)
-                        type_cast = "::jsonb"
-                    elif field == "date_of_birth" and isinstance(value, str):
-                        from datetime import datetime
-                        value = datetime.strptime(value, "%Y-%m-%d").date()
-                        type_cast = ""
-                    elif field in ["budget_min", "budget_max"]:
-                        value = float(value) if value else None
-                        type_cast = ""
-                    else:
-                        type_cast = ""
-
-                    if only_empty_fields:
-                        # Only update if current value is NULL or empty string
-                        set_clauses.append(
-                            f"{field} = CASE WHEN {field} IS NULL OR {field} = '' THEN ${param_num}{type_cast} ELSE {field} END"
-                        )
-                    else:
-                        set_clauses.append(f"{field} = ${param_num}{type_cast}")
-
-                    values.append(value)
-                    param_num += 1
-
-                if not set_clauses:
-                    return True
-
-                # Add contact_id as last param
-                values.append(contact_id)
-
-                query = f"""
-                    UPDATE contacts
-                    SET {', '.join(set_clauses)}, updated_at = NOW()
-                    WHERE id = ${param_num}
-                """
-
-                result = await conn.execute(query, *values)
+            # Fields that are absent (or excluded by specific_fields) bind NULL
+            # and keep their current value
+            values = [
+                _coerce_contact_value(field, update_data.get(field))
+                if not specific_fields or field in specific_fields
+                else None
+                for field in _CONTACT_UPDATE_FIELDS
+            ]
+
+            if all(value is None for value in values):
+                return True
+
+            async with cls._pool.acquire(timeout=settings.db_acquire_timeout_seconds) as conn:
+                result = await conn.execute(
+                    _SQL_UPDATE_CONTACT,
+                    *values,
+                    only_empty_fields,
+                    contact_id,
+                )
                 return "UPDATE" in result
 
         except Exception as e:
@@ -1065,9 +1432,6 @@ class Database:
         Note: This uses HTTP request, not database connection
         Handles both public and private bucket URLs
         """
-        import aiohttp
-        from app.config import settings
-
         try:
             # Convert public URL to authenticated URL for private buckets
             # Public:  /storage/v1/object/public/bucket/path
@@ -1078,25 +1442,28 @@ class Database:
             logger.info(f"Download URL: {download_url}")
             logger.info(f"Service key configured: {bool(settings.supabase_service_key)}")
 
-            async with aiohttp.ClientSession() as session:
-                # Add authorization header for private buckets
-                headers = {
-                    "Authorization": f"Bearer {settings.supabase_service_key}",
-                    "apikey": settings.supabase_service_key or ""
-                }
-
-                logger.info(f"Making request with auth headers...")
-
-                async with session.get(download_url, headers=headers) as response:
-                    logger.info(f"Response status: {response.status}")
-                    if response.status == 200:
-                        content = await response.read()
-                        logger.info(f"Downloaded {len(content)} bytes")
-                        return content
-                    else:
-                        response_text = await response.text()
-                        logger.error(f"Failed to download file: {response.status} - {response_text}")
-                        return None
+            # Add authorization header for private buckets
+            headers = {
+                "Authorization": f"Bearer {settings.supabase_service_key}",
+                "apikey": settings.supabase_service_key or ""
+            }
+
+            logger.info(f"Making request with auth headers...")
+
+            # Shared session keeps TLS connections to Storage alive between calls
+            async with cls._get_http_session().get(download_url, headers=headers) as response:
+                logger.info(f"Response status: {response.status}")
+                if response.status == 200:
+                    buffer = io.BytesIO()
+                    async for chunk in response.content.iter_chunked(1 << 16):
+                        buffer.write(chunk)
+                    content = buffer.getvalue()
+                    logger.info(f"Downloaded {len(content)} bytes")
+                    return content
+                else:
+                    response_text = await response.text()
+                    logger.error(f"Failed to download file: {response.status} - {response_text}")
+                    return None
 
         except Exception as e:
             logger.error(f"Failed to download file from storage: {e}")
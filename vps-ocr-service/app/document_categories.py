@@ -5,6 +5,7 @@ Based on Spanish real estate compliance requirements.
 These categories MUST match exactly with frontend config (document-categories.ts)
 """
 
+from types import MappingProxyType
 from typing import List, Dict
 
 # Document categories organized by risk level
@@ -75,16 +76,25 @@ DOCUMENT_CATEGORIES = {
     ],
 }
 
+# Category -> risk level, for single-lookup get_category_risk_level().
+# Built from the lowest level up so a category listed under several levels
+# keeps the highest one
+_CATEGORY_TO_RISK = {
+    category: level
+    for level in ("advised", "recommended", "critical")
+    for category in DOCUMENT_CATEGORIES[level]
+}
+
 # Flat list of all categories for AI to choose from
-ALL_CATEGORIES = (
+ALL_CATEGORIES = tuple(
     DOCUMENT_CATEGORIES["critical"]
     + DOCUMENT_CATEGORIES["recommended"]
     + DOCUMENT_CATEGORIES["advised"]
     + ["otro"]  # Otro (Other)
 )
 
-# Importance score mapping (1-10 scale)
-IMPORTANCE_SCORES = {
+# Importance score mapping (1-10 scale), read-only
+IMPORTANCE_SCORES = MappingProxyType({
     # Critical documents (8-10)
     "dni_nie_passport": 10,
     "power_of_attorney": 9,
@@ -143,7 +153,8 @@ IMPORTANCE_SCORES = {
     "water_rights": 4,
     "fotos": 2,
     "otro": 1,
-}
+})
+_get_importance = IMPORTANCE_SCORES.get
 
 # System prompt for Deepseek AI labeling
 SYSTEM_PROMPT = """You are an expert real estate document classifier for the Spanish market.
@@ -272,16 +283,9 @@ Return valid JSON only, no explanation:
 
 def get_importance_score(category: str) -> int:
     """Get importance score for a document category (1-10)"""
-    return IMPORTANCE_SCORES.get(category, 1)
+    return _get_importance(category, 1)
 
 
 def get_category_risk_level(category: str) -> str:
     """Get risk level for a document category"""
-    if category in DOCUMENT_CATEGORIES["critical"]:
-        return "critical"
-    elif category in DOCUMENT_CATEGORIES["recommended"]:
-        return "recommended"
-    elif category in DOCUMENT_CATEGORIES["advised"]:
-        return "advised"
-    else:
-        return "other"
+    return _CATEGORY_TO_RISK.get(category, "other")
@@ -1,8 +1,12 @@
 """Embeddings Worker - sentence-transformers processing"""
 
 from sentence_transformers import SentenceTransformer
+import asyncio
 import hashlib
-from typing import List, Dict, Any
+import numpy as np
+import torch
+from collections import OrderedDict
+from typing import List, Dict, Optional, Tuple
 from loguru import logger
 from app.config import settings
 from app.models import EmbeddingChunk
@@ -17,8 +21,19 @@ class EmbeddingsWorker:
     - Multilingual (50+ languages including Spanish/English)
     - Runs efficiently on CPU
     - ~500MB RAM usage
+
+    Concurrent generate() calls are coalesced: chunks from requests that
+    arrive within BATCH_WINDOW_SECONDS of each other are encoded in one
+    model.encode() call and the result is split back per request
     """
 
+    BATCH_WINDOW_SECONDS = 0.02
+    MAX_BATCH_TEXTS = 256
+
+    # Documents repeat a lot of boilerplate, so vectors are cached by
+    # content hash (LRU, size-bounded)
+    EMBEDDING_CACHE_SIZE = 10000
+
     def __init__(self):
         logger.info(f"Loading embeddings model: {settings.embeddings_model}")
 
@@ -28,11 +43,50 @@ class EmbeddingsWorker:
             settings.embeddings_model, device=settings.embeddings_device
         )
 
+        self.on_gpu = settings.embeddings_device.startswith("cuda")
+
+        # FP16 weights halve memory traffic on GPU; CPU kernels stay FP32
+        if self.on_gpu:
+            self.model.half()
+        else:
+            if settings.embeddings_int8:
+                # Dynamic INT8 Linear layers use the VNNI/int8 GEMM kernels
+                # and dominate the model's CPU time
+                self.model = torch.quantization.quantize_dynamic(
+                    self.model, {torch.nn.Linear}, dtype=torch.qint8
+                )
+
+            # Encodes run one at a time on a worker thread (see _batch_loop),
+            # so intra-op threads get the cores and inter-op pools would
+            # only oversubscribe them
+            try:
+                torch.set_num_interop_threads(1)
+            except RuntimeError:
+                # Already fixed once any parallel work has run
+                pass
+
         # Set batch size for encoding
         self.batch_size = settings.embeddings_batch_size
 
+        # Pending (chunk_texts, future) requests, drained by _batch_loop
+        # (both created on first use so they bind to the running loop)
+        self._queue: Optional[asyncio.Queue] = None
+        self._batch_task: Optional[asyncio.Task] = None
+
+        self._embedding_cache: "OrderedDict[str, List[float]]" = OrderedDict()
+
         logger.info("✅ Embeddings model loaded")
 
+    async def close(self):
+        """Stop the batching task"""
+        if self._batch_task is not None:
+            self._batch_task.cancel()
+            try:
+                await self._batch_task
+            except asyncio.CancelledError:
+                pass
+            self._batch_task = None
+
     async def generate(
         self, document_id: str, user_id: str, text: str
     ) -> List[EmbeddingChunk]:
@@ -62,29 +116,55 @@ class EmbeddingsWorker:
             f"Generating embeddings for {len(chunks)} chunks (document {document_id})"
         )
 
-        # Extract text from chunks
-        chunk_texts = [chunk["text"] for chunk in chunks]
+        content_hashes = [self._hash_text(chunk_text) for chunk_text in chunks]
+
+        # Reuse cached vectors; encode each unseen text once
+        to_encode: Dict[str, str] = {}
+        for content_hash, chunk_text in zip(content_hashes, chunks):
+            if content_hash in self._embedding_cache:
+                self._embedding_cache.move_to_end(content_hash)
+            else:
+                to_encode.setdefault(content_hash, chunk_text)
+
+        encoded: Dict[str, List[float]] = {}
+        if to_encode:
+            # Generate embeddings (batched with other concurrent documents)
+            embeddings = await self._encode(list(to_encode.values()))
+
+            # Convert all vectors to Python lists in one C-level call
+            new_vectors = np.asarray(embeddings, dtype=np.float32).tolist()
+            encoded = dict(zip(to_encode, new_vectors))
+
+            for content_hash, vector in encoded.items():
+                self._embedding_cache[content_hash] = vector
+            while len(self._embedding_cache) > self.EMBEDDING_CACHE_SIZE:
+                self._embedding_cache.popitem(last=False)
 
-        # Generate embeddings in batches
-        embeddings = self.model.encode(
-            chunk_texts,
-            batch_size=self.batch_size,
-            show_progress_bar=False,
-            convert_to_numpy=True,
+        logger.info(
+            f"Encoded {len(to_encode)} of {len(chunks)} chunks "
+            f"({len(chunks) - len(to_encode)} cached or repeated)"
         )
 
+        vectors = [
+            encoded[content_hash] if content_hash in encoded
+            else self._embedding_cache[content_hash]
+            for content_hash in content_hashes
+        ]
+
         # Create EmbeddingChunk objects
         embedding_chunks = []
 
-        for i, (chunk, embedding_vector) in enumerate(zip(chunks, embeddings)):
+        for i, (chunk_text, embedding_vector, content_hash) in enumerate(
+            zip(chunks, vectors, content_hashes)
+        ):
             chunk_obj = EmbeddingChunk(
                 document_id=document_id,
                 user_id=user_id,
                 chunk_index=i,
-                chunk_text=chunk["text"],
-                chunk_length=len(chunk["text"]),
-                embedding=embedding_vector.tolist(),  # Convert numpy array to list
-                content_hash=self._hash_text(chunk["text"]),
+                chunk_text=chunk_text,
+                chunk_length=len(chunk_text),
+                embedding=embedding_vector,
+                content_hash=content_hash,
             )
             embedding_chunks.append(chunk_obj)
 
@@ -92,46 +172,103 @@ class EmbeddingsWorker:
 
         return embedding_chunks
 
-    def _split_text(self, text: str) -> List[Dict[str, Any]]:
+    async def _encode(self, chunk_texts: List[str]):
+        """Queue texts for the next coalesced encode and wait for their vectors"""
+        if self._batch_task is None or self._batch_task.done():
+            self._queue = asyncio.Queue()
+            self._batch_task = asyncio.create_task(self._batch_loop())
+
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((chunk_texts, future))
+        return await future
+
+    async def _batch_loop(self):
+        """Collect queued requests for a short window and encode them together"""
+        loop = asyncio.get_running_loop()
+
+        while True:
+            requests: List[Tuple[List[str], asyncio.Future]] = [await self._queue.get()]
+            total = len(requests[0][0])
+            deadline = loop.time() + self.BATCH_WINDOW_SECONDS
+
+            while total < self.MAX_BATCH_TEXTS:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    request = await asyncio.wait_for(self._queue.get(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    break
+                requests.append(request)
+                total += len(request[0])
+
+            all_texts = [text for texts, _ in requests for text in texts]
+
+            try:
+                # encode() is CPU-bound; keep the event loop responsive
+                embeddings = await asyncio.to_thread(self._encode_texts, all_texts)
+            except Exception as e:
+                for _, future in requests:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            offset = 0
+            for texts, future in requests:
+                if not future.done():
+                    future.set_result(embeddings[offset:offset + len(texts)])
+                offset += len(texts)
+
+    def _encode_texts(self, texts: List[str]) -> np.ndarray:
+        """Run the model on texts (blocking; called from a worker thread)"""
+        # inference_mode is thread-local, so it is entered on the encoding thread
+        with torch.inference_mode():
+            if self.on_gpu:
+                # Stack on the device and copy to host once, instead of one
+                # device-to-host copy per vector
+                embeddings = self.model.encode(
+                    texts,
+                    batch_size=self.batch_size,
+                    show_progress_bar=False,
+                    convert_to_tensor=True,
+                )
+                return embeddings.float().cpu().numpy()
+
+            return self.model.encode(
+                texts,
+                batch_size=self.batch_size,
+                show_progress_bar=False,
+                convert_to_numpy=True,
+            )
+
+    def _split_text(self, text: str) -> List[str]:
         """
         Split text into overlapping chunks
 
         Uses character-based chunking with overlap to preserve context
         """
-        chunks = []
         chunk_size = settings.embeddings_chunk_size
         chunk_overlap = settings.embeddings_chunk_overlap
 
         # Clean text
         text = text.strip()
+        text_length = len(text)
 
-        if len(text) <= chunk_size:
+        if text_length <= chunk_size:
             # Text is small enough, return as single chunk
-            return [{"text": text, "start": 0, "end": len(text)}]
-
-        start = 0
+            return [text]
 
-        while start < len(text):
+        # One chunk per stride; a chunk whose leftover tail would be smaller
+        # than the overlap absorbs the rest of the text
+        chunks = []
+        for start in range(0, text_length, chunk_size - chunk_overlap):
             end = start + chunk_size
-
-            # Don't create tiny chunks at the end
-            if end >= len(text):
-                end = len(text)
-            elif len(text) - end < chunk_overlap:
-                # If remaining text is smaller than overlap, include it all
-                end = len(text)
+            if text_length - end < chunk_overlap:
+                end = text_length
 
             chunk_text = text[start:end].strip()
-
             if chunk_text:  # Only add non-empty chunks
-                chunks.append({"text": chunk_text, "start": start, "end": end})
-
-            # Move start position with overlap
-            start += chunk_size - chunk_overlap
-
-            # Prevent infinite loop
-            if start >= len(text):
-                break
+                chunks.append(chunk_text)
 
         return chunks
 
@@ -139,6 +276,7 @@ class EmbeddingsWorker:
         """
         Create hash of text for deduplication
 
-        Uses SHA256 hash truncated to 16 characters
+        Uses a 64-bit BLAKE2b digest (16 hex characters); this is only a
+        dedup key, so a non-truncated short digest is enough
         """
-        return hashlib.sha256(text.encode()).hexdigest()[:16]
+        return hashlib.blake2b(text.encode(), digest_size=8).hexdigest()
@@ -1,7 +1,7 @@
 """Job Poller - Polls database for OCR jobs and processes them"""
 
 import asyncio
-from typing import Optional
+from typing import Optional, Set
 from loguru import logger
 from app.config import settings
 from app.database import Database
@@ -24,6 +24,12 @@ class JobPoller:
         self.webhook = WebhookNotifier()
         self.is_running = False
         self.task: Optional[asyncio.Task] = None
+        self.job_available = asyncio.Event()
+        self.listening = False
+        # Up to WORKER_THREADS jobs run at once; a slot is taken before
+        # claiming so no job is claimed without capacity to run it
+        self.job_slots = asyncio.Semaphore(settings.worker_threads)
+        self.job_tasks: Set[asyncio.Task] = set()
 
     async def start(self):
         """Start polling for jobs"""
@@ -31,6 +37,9 @@ class JobPoller:
             logger.warning("Job poller already running")
             return
 
+        # Wake up on NOTIFY instead of polling an empty queue
+        self.listening = await Database.listen_for_jobs("ocr_job_available", self.job_available.set)
+
         self.is_running = True
         self.task = asyncio.create_task(self._poll_loop())
         logger.info(f"✅ Job poller started (instance: {settings.vps_instance_id})")
@@ -49,6 +58,14 @@ class JobPoller:
             except asyncio.CancelledError:
                 pass
 
+        # Cancel in-flight jobs the same way a cancelled loop used to
+        for task in self.job_tasks:
+            task.cancel()
+        if self.job_tasks:
+            await asyncio.gather(*self.job_tasks, return_exceptions=True)
+
+        await self.webhook.close()
+
         logger.info("Job poller stopped")
 
     async def _poll_loop(self):
@@ -58,19 +75,31 @@ class JobPoller:
 
         while self.is_running:
             try:
-                # Get next job from database
-                job_data = await Database.get_next_ocr_job(settings.vps_instance_id)
-
-                if job_data:
+                await self.job_slots.acquire()
+                try:
+                    # Clear before fetching so a notification arriving mid-query isn't lost
+                    self.job_available.clear()
+
+                    # Get next job from database
+                    job_data = await Database.get_next_ocr_job(settings.vps_instance_id)
+                    job = OCRJob(**job_data) if job_data else None
+                except BaseException:
+                    self.job_slots.release()
+                    raise
+
+                if job:
                     # Reset error counter on successful job fetch
                     consecutive_errors = 0
 
-                    # Process the job
-                    await self._process_job(OCRJob(**job_data))
+                    # Process the job in the background; its slot is released when done
+                    task = asyncio.create_task(self._run_job(job))
+                    self.job_tasks.add(task)
+                    task.add_done_callback(self.job_tasks.discard)
 
                 else:
-                    # No jobs available, wait before polling again
-                    await asyncio.sleep(settings.poll_interval_seconds)
+                    self.job_slots.release()
+                    # No jobs available, wait for a notification (or the poll interval)
+                    await self._wait_for_job()
 
             except asyncio.CancelledError:
                 logger.info("Poll loop cancelled")
@@ -93,6 +122,32 @@ class JobPoller:
                 else:
                     await asyncio.sleep(10)  # Normal error backoff
 
+    async def _run_job(self, job: OCRJob):
+        """Process one claimed job, then free its slot"""
+        try:
+            # No connection is held across OCR and webhook retries; each DB
+            # call acquires its own, and an acquire timeout while saving
+            # lands in the failure path, which marks the claimed job failed
+            await self._process_job(job)
+        except Exception as e:
+            logger.error(f"❌ Error running job {job.document_id}: {e}", exc_info=True)
+        finally:
+            self.job_slots.release()
+
+    async def _wait_for_job(self):
+        """Wait until a job is announced or the idle interval elapses"""
+        # Only the safety-net poll while notifications arrive; the regular
+        # poll interval while the listener is down or reconnecting
+        idle_wait_seconds = (
+            settings.listen_fallback_poll_seconds
+            if self.listening and Database.is_listening()
+            else settings.poll_interval_seconds
+        )
+        try:
+            await asyncio.wait_for(self.job_available.wait(), timeout=idle_wait_seconds)
+        except asyncio.TimeoutError:
+            pass
+
     async def _process_job(self, job: OCRJob):
         """
         Process a single OCR job
@@ -120,44 +175,28 @@ class JobPoller:
             # Step 2: Save to database
             logger.info(f"[2/2] Saving OCR text to database")
 
-            await Database.save_ocr_result(
+            # Step 3: Update queue status to completed (same connection)
+            await Database.complete_ocr_job(
+                queue_id=job.queue_id,
                 document_id=job.document_id,
                 ocr_text=ocr_result.text,
             )
 
-            # Step 3: Update queue status to completed
-            await Database.update_ocr_job_status(
-                queue_id=job.queue_id, status="completed"
-            )
-
             logger.info(f"✅ Job completed: {job.document_id}")
 
-            # Step 3.5: Trigger AI labeling (automatic)
-            try:
-                from app.config import settings
-                if settings.ai_labeling_enabled and settings.deepseek_api_key:
-                    # Get user_id for the document
-                    user_id = await Database.get_document_user_id(job.document_id)
-                    if user_id:
-                        await Database.create_ai_labeling_job(
-                            document_id=job.document_id,
-                            user_id=user_id,
-                            trigger_type="auto"
-                        )
-                        logger.info(f"🤖 Triggered AI labeling for {job.document_id}")
-                    else:
-                        logger.warning(f"Could not get user_id for document {job.document_id}")
-            except Exception as ai_error:
-                # Don't fail the OCR job if AI labeling trigger fails
-                logger.error(f"Failed to trigger AI labeling: {ai_error}")
-
-            # Step 4: Send webhook notification (optional)
-            if self.webhook.enabled:
-                await self.webhook.notify_success(
+            # Step 3.5 + 4: Trigger AI labeling and send the webhook
+            # notification concurrently; neither depends on the other and
+            # both handle their own errors
+            notify = (
+                self.webhook.notify_success(
                     document_id=job.document_id,
                     queue_id=job.queue_id,
                     ocr_text=ocr_result.text,
                 )
+                if self.webhook.enabled
+                else asyncio.sleep(0)
+            )
+            await asyncio.gather(self._trigger_ai_labeling(job), notify)
 
         except Exception as e:
             logger.error(f"❌ Job failed: {job.document_id} - {e}", exc_info=True)
@@ -178,3 +217,22 @@ class JobPoller:
 
             except Exception as update_error:
                 logger.error(f"Failed to update job status: {update_error}")
+
+    async def _trigger_ai_labeling(self, job: OCRJob):
+        """Queue automatic AI labeling for a completed OCR job"""
+        try:
+            if settings.ai_labeling_enabled and settings.deepseek_api_key:
+                # user_id comes with the claimed job; look it up only if missing
+                user_id = job.user_id or await Database.get_document_user_id(job.document_id)
+                if user_id:
+                    await Database.create_ai_labeling_job(
+                        document_id=job.document_id,
+                        user_id=user_id,
+                        trigger_type="auto"
+                    )
+                    logger.info(f"🤖 Triggered AI labeling for {job.document_id}")
+                else:
+                    logger.warning(f"Could not get user_id for document {job.document_id}")
+        except Exception as ai_error:
+            # Don't fail the OCR job if AI labeling trigger fails
+            logger.error(f"Failed to trigger AI labeling: {ai_error}")
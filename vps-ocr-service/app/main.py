@@ -4,47 +4,140 @@ Realthor VPS OCR Service
 FastAPI application for document OCR processing with embeddings generation
 """
 
-from fastapi import FastAPI
-from fastapi.responses import JSONResponse
-from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.responses import ORJSONResponse
+from contextlib import AsyncExitStack, asynccontextmanager
 from loguru import logger
+import asyncio
 import sys
+import uuid
 
 from app.config import settings
 from app.database import Database
-from app.ocr_worker import OCRWorker
-from app.ai_labeling_worker import AILabelingWorker
-from app.contact_import_worker import ContactImportWorker
-from app.job_poller import JobPoller
-from app.ai_labeling_poller import AILabelingPoller
-from app.contact_import_poller import ContactImportPoller
 from app.models import HealthResponse, QueueStats
 from app import __version__
 
 # Configure logging
+# enqueue=True hands records to a background thread, so formatting and sink
+# I/O never block the event loop; backtrace/diagnose are off to skip frame
+# variable introspection on logged exceptions. Timestamps are UTC, which
+# skips the local timezone conversion on every record. Color markup is only
+# used for an interactive terminal; files and log collectors get plain text.
+# File rotation, retention and compression also run on the queue thread
+_PLAIN_LOG_FORMAT = "{time:YYYY-MM-DD HH:mm:ss!UTC} | {level: <8} | {name}:{function}:{line} - {message}"
+_COLOR_LOG_FORMAT = "<green>{time:YYYY-MM-DD HH:mm:ss!UTC}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>"
+
+_stdout_is_tty = sys.stdout.isatty()
+
 logger.remove()  # Remove default handler
 logger.add(
     sys.stdout,
-    format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>",
+    format=_COLOR_LOG_FORMAT if _stdout_is_tty else _PLAIN_LOG_FORMAT,
+    colorize=_stdout_is_tty,
     level=settings.log_level,
+    enqueue=True,
+    backtrace=False,
+    diagnose=False,
 )
 
 # Add file logging if configured
 if settings.log_file:
     logger.add(
         settings.log_file,
+        format=_PLAIN_LOG_FORMAT,
+        colorize=False,
         rotation=settings.log_rotation,
         retention=settings.log_retention,
+        compression=settings.log_compression or None,
         level=settings.log_level,
+        enqueue=True,
+        backtrace=False,
+        diagnose=False,
     )
 
-# Global instances
-ocr_worker: OCRWorker = None
-ai_labeling_worker: AILabelingWorker = None
-contact_import_worker: ContactImportWorker = None
-job_poller: JobPoller = None
-ai_labeling_poller: AILabelingPoller = None
-contact_import_poller: ContactImportPoller = None
+_SEP = "=" * 60
+
+# Feature switches are read once; lifespan and / share the same answer
+_AI_LABELING_ON = bool(settings.ai_labeling_enabled and settings.deepseek_api_key)
+_CONTACT_IMPORT_ON = settings.contact_import_enabled
+
+@asynccontextmanager
+async def ocr_lifespan(app: FastAPI):
+    """Connect to the database, load the OCR models and run the OCR job poller"""
+    # PaddleOCR (paddle, opencv) is imported on startup rather than with the
+    # app module, so building the app object stays fast
+    from app.ocr_worker import OCRWorker
+    from app.job_poller import JobPoller
+
+    state = app.state
+    try:
+        # Independent, so the connection handshake overlaps with loading the
+        # model weights (on a worker thread). Both sides run to completion so
+        # a worker loaded alongside a failed connect is still kept on state
+        # and closed (with its OCR processes) below
+        logger.info("[1/3] Connecting to database and loading OCR models (PaddleOCR)...")
+        connected, ocr_worker = await asyncio.gather(
+            Database.connect(),
+            asyncio.to_thread(OCRWorker),
+            return_exceptions=True,
+        )
+        if not isinstance(ocr_worker, BaseException):
+            state.ocr_worker = ocr_worker
+        for outcome in (connected, ocr_worker):
+            if isinstance(outcome, BaseException):
+                raise outcome
+
+        logger.info("      Starting OCR job poller...")
+        state.job_poller = JobPoller(state.ocr_worker)
+        await state.job_poller.start()
+
+        yield
+
+    finally:
+        if state.job_poller:
+            await state.job_poller.stop()
+
+        if state.ocr_worker:
+            await state.ocr_worker.close()
+
+        await Database.disconnect()
+
+
+@asynccontextmanager
+async def ai_labeling_lifespan(app: FastAPI):
+    """Load the AI labeling worker and run its job poller"""
+    # Imported here so a disabled subsystem never loads its modules
+    from app.ai_labeling_worker import AILabelingWorker
+    from app.ai_labeling_poller import AILabelingPoller
+
+    state = app.state
+    logger.info("[2/3] Loading AI labeling worker (Deepseek)...")
+    state.ai_labeling_worker = AILabelingWorker()
+    state.ai_labeling_poller = AILabelingPoller(state.ai_labeling_worker)
+    try:
+        await state.ai_labeling_poller.start()
+        logger.info("🤖 AI labeling active (Deepseek)")
+        yield
+    finally:
+        await state.ai_labeling_poller.stop()
+
+
+@asynccontextmanager
+async def contact_import_lifespan(app: FastAPI):
+    """Load the contact import worker and run its job poller"""
+    from app.contact_import_worker import ContactImportWorker
+    from app.contact_import_poller import ContactImportPoller
+
+    state = app.state
+    logger.info("[3/3] Loading contact import worker...")
+    state.contact_import_worker = ContactImportWorker()
+    state.contact_import_poller = ContactImportPoller(state.contact_import_worker)
+    try:
+        await state.contact_import_poller.start()
+        logger.info("📥 Contact import active")
+        yield
+    finally:
+        await state.contact_import_poller.stop()
 
 
 @asynccontextmanager
@@ -52,21 +145,23 @@ async def lifespan(app: FastAPI):
     """
     Startup and shutdown events
 
-    Startup:
-    - Load ML models (OCR only)
-    - Load AI labeling worker (optional)
-    - Load contact import worker (optional)
-    - Connect to database
-    - Start job pollers (OCR + AI labeling + Contact Import)
-
-    Shutdown:
-    - Stop job pollers
-    - Close database connections
+    Each subsystem has its own lifespan; optional ones are entered only when
+    enabled, and the exit stack shuts them down in reverse order:
+    - OCR: database connection, OCR models and OCR job poller (always)
+    - AI labeling: worker and poller (optional)
+    - Contact import: worker and poller (optional)
     """
-    global ocr_worker, ai_labeling_worker, contact_import_worker
-    global job_poller, ai_labeling_poller, contact_import_poller
-
-    logger.info("=" * 60)
+    # Workers and pollers live on app.state; endpoints reach them through
+    # request.app.state instead of module globals
+    state = app.state
+    state.ocr_worker = None
+    state.ai_labeling_worker = None
+    state.contact_import_worker = None
+    state.job_poller = None
+    state.ai_labeling_poller = None
+    state.contact_import_poller = None
+
+    logger.info(_SEP)
     logger.info(f"🚀 Starting Realthor VPS OCR + AI Service v{__version__}")
     logger.info(f"Instance ID: {settings.vps_instance_id}")
     logger.info(f"OCR Language: {settings.ocr_language}")
@@ -74,82 +169,42 @@ async def lifespan(app: FastAPI):
     logger.info(f"AI Labeling Enabled: {settings.ai_labeling_enabled}")
     logger.info(f"Contact Import Enabled: {settings.contact_import_enabled}")
     logger.info(f"Webhook Enabled: {settings.webhook_enabled}")
-    logger.info("=" * 60)
+    logger.info(_SEP)
 
     try:
-        # Step 1: Connect to database
-        logger.info("[1/6] Connecting to database...")
-        await Database.connect()
-
-        # Step 2: Load OCR models
-        logger.info("[2/6] Loading OCR models (PaddleOCR)...")
-        ocr_worker = OCRWorker()
-
-        # Step 3: Load AI labeling worker (optional)
-        if settings.ai_labeling_enabled and settings.deepseek_api_key:
-            logger.info("[3/6] Loading AI labeling worker (Deepseek)...")
-            ai_labeling_worker = AILabelingWorker()
-        else:
-            logger.warning("[3/6] AI labeling disabled (missing DEEPSEEK_API_KEY)")
-
-        # Step 4: Load contact import worker (optional)
-        if settings.contact_import_enabled:
-            logger.info("[4/6] Loading contact import worker...")
-            contact_import_worker = ContactImportWorker()
-        else:
-            logger.info("[4/6] Contact import disabled")
-
-        # Step 5: Start OCR job poller
-        logger.info("[5/6] Starting OCR job poller...")
-        job_poller = JobPoller(ocr_worker)
-        await job_poller.start()
-
-        # Step 5b: Start AI labeling job poller (if AI labeling is enabled)
-        if ai_labeling_worker:
-            logger.info("      Starting AI labeling job poller...")
-            ai_labeling_poller = AILabelingPoller(ai_labeling_worker)
-            await ai_labeling_poller.start()
-
-        # Step 6: Start contact import job poller (if enabled)
-        if contact_import_worker:
-            logger.info("[6/6] Starting contact import job poller...")
-            contact_import_poller = ContactImportPoller(contact_import_worker)
-            await contact_import_poller.start()
-        else:
-            logger.info("[6/6] Skipping contact import poller (disabled)")
-
-        logger.info("=" * 60)
-        logger.info("✅ Service is ready!")
-        logger.info(f"📊 Polling interval: {settings.poll_interval_seconds}s")
-        if ai_labeling_worker:
-            logger.info(f"🤖 AI labeling active (Deepseek)")
-        if contact_import_worker:
-            logger.info(f"📥 Contact import active")
-        logger.info("=" * 60)
-
-        yield
-
-    except Exception as e:
-        logger.error(f"❌ Failed to start service: {e}", exc_info=True)
-        raise
+        async with AsyncExitStack() as stack:
+            await stack.enter_async_context(ocr_lifespan(app))
 
-    finally:
-        # Shutdown
-        logger.info("🛑 Shutting down service...")
+            if _AI_LABELING_ON:
+                await stack.enter_async_context(ai_labeling_lifespan(app))
+            else:
+                logger.warning("[2/3] AI labeling disabled (missing DEEPSEEK_API_KEY)")
 
-        if job_poller:
-            await job_poller.stop()
+            if _CONTACT_IMPORT_ON:
+                await stack.enter_async_context(contact_import_lifespan(app))
+            else:
+                logger.info("[3/3] Contact import disabled")
 
-        if ai_labeling_poller:
-            await ai_labeling_poller.stop()
+            logger.info(_SEP)
+            logger.info("✅ Service is ready!")
+            logger.info(f"📊 Polling interval: {settings.poll_interval_seconds}s")
+            logger.info(_SEP)
 
-        if contact_import_poller:
-            await contact_import_poller.stop()
+            try:
+                yield
+            finally:
+                logger.info("🛑 Shutting down service...")
 
-        await Database.disconnect()
+    except Exception as e:
+        logger.opt(exception=e).error("❌ Failed to start service: {}", e)
+        raise
 
+    finally:
         logger.info("✅ Service stopped")
 
+        # Flush records still queued for the background sink thread
+        await logger.complete()
+
 
 # Create FastAPI app
 app = FastAPI(
@@ -157,26 +212,42 @@ app = FastAPI(
     description="Document OCR processing and AI-powered labeling for Realthor CRM",
     version=__version__,
     lifespan=lifespan,
+    # orjson serializes straight to bytes for every endpoint returning a dict
+    default_response_class=ORJSONResponse,
 )
 
 
-@app.get("/", response_model=dict)
+# The root payload never changes while the process runs
+_ROOT_INFO = {
+    "service": "Realthor VPS OCR + AI Labeling Service",
+    "version": __version__,
+    "status": "running",
+    "instance_id": settings.vps_instance_id,
+    "features": {
+        "ocr": True,
+        "ai_labeling": _AI_LABELING_ON,
+    }
+}
+
+
+@app.get("/")
 async def root():
     """Root endpoint"""
-    return {
-        "service": "Realthor VPS OCR + AI Labeling Service",
-        "version": __version__,
-        "status": "running",
-        "instance_id": settings.vps_instance_id,
-        "features": {
-            "ocr": True,
-            "ai_labeling": settings.ai_labeling_enabled and settings.deepseek_api_key is not None,
-        }
-    }
+    return _ROOT_INFO
 
 
+# Fields of HealthResponse that never change while the process runs
+_HEALTH_STATIC = {
+    "status": "ok",
+    "vps_instance_id": settings.vps_instance_id,
+    "version": __version__,
+}
+
+
+# The probe endpoints return ORJSONResponse directly: the response_model still
+# documents the shape, but FastAPI skips building and re-validating a model
 @app.get("/health", response_model=HealthResponse)
-async def health_check():
+async def health_check(request: Request):
     """
     Health check endpoint
 
@@ -184,13 +255,11 @@ async def health_check():
     """
     queue_stats = await Database.get_queue_stats()
 
-    return HealthResponse(
-        status="ok",
-        models_loaded=ocr_worker is not None,
-        queue_size=queue_stats["queued"],
-        vps_instance_id=settings.vps_instance_id,
-        version=__version__,
-    )
+    return ORJSONResponse({
+        **_HEALTH_STATIC,
+        "models_loaded": getattr(request.app.state, "ocr_worker", None) is not None,
+        "queue_size": queue_stats.queued,
+    })
 
 
 @app.get("/api/queue/stats", response_model=QueueStats)
@@ -200,20 +269,20 @@ async def queue_stats():
 
     Returns counts of queued, processing, completed, and failed jobs
     """
-    stats = await Database.get_queue_stats()
-    return QueueStats(**stats)
+    # orjson serializes the (slotted) dataclass natively
+    return ORJSONResponse(await Database.get_queue_stats())
 
 
-@app.get("/api/test/ocr", response_model=dict)
-async def test_ocr():
+@app.get("/api/test/ocr")
+async def test_ocr(request: Request):
     """
     Test OCR functionality
 
     This endpoint can be used to verify OCR is working
     Returns info about loaded models
     """
-    if not ocr_worker:
-        return JSONResponse(
+    if not getattr(request.app.state, "ocr_worker", None):
+        return ORJSONResponse(
             status_code=503, content={"error": "OCR worker not initialized"}
         )
 
@@ -225,7 +294,7 @@ async def test_ocr():
     }
 
 
-@app.get("/api/test/embeddings", response_model=dict)
+@app.get("/api/test/embeddings")
 async def test_embeddings():
     """
     Embeddings functionality has been removed
@@ -243,10 +312,13 @@ async def test_embeddings():
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
     """Global exception handler"""
-    logger.error(f"Unhandled exception: {exc}", exc_info=True)
-    return JSONResponse(
+    # The client gets an id to quote instead of the exception text; the
+    # traceback is attached to the record and rendered on the log thread
+    error_id = uuid.uuid4().hex
+    logger.opt(exception=exc).error("Unhandled exception (error_id={}): {}", error_id, exc)
+    return ORJSONResponse(
         status_code=500,
-        content={"error": "Internal server error", "detail": str(exc)},
+        content={"error": "Internal server error", "error_id": error_id},
     )
 
 
@@ -257,6 +329,10 @@ if __name__ == "__main__":
         "app.main:app",
         host="0.0.0.0",
         port=8000,
+        # Both ship with uvicorn[standard]; pinned so a missing extra fails
+        # loudly instead of silently falling back to asyncio/h11
+        loop="uvloop",
+        http="httptools",
         reload=False,  # Disable reload in production
         log_level=settings.log_level.lower(),
     )
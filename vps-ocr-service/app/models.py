@@ -1,9 +1,7 @@
 """Pydantic models for API requests/responses"""
 
-from pydantic import BaseModel, Field, field_validator
-from typing import Optional, List, Dict, Any, Union
-from datetime import datetime
-from uuid import UUID
+from pydantic import BaseModel
+from typing import Optional, List
 
 
 class OCRJob(BaseModel):
@@ -13,14 +11,7 @@ class OCRJob(BaseModel):
     document_id: str
     file_url: str
     file_type: str
-
-    @field_validator('queue_id', 'document_id', mode='before')
-    @classmethod
-    def convert_uuid_to_str(cls, v):
-        """Convert UUID objects to strings"""
-        if isinstance(v, UUID):
-            return str(v)
-        return v
+    user_id: Optional[str] = None  # Document owner, returned by get_next_ocr_job
 
 
 class AILabelingJob(BaseModel):
@@ -32,14 +23,6 @@ class AILabelingJob(BaseModel):
     ocr_text: str
     trigger_type: str  # 'auto' or 'manual'
 
-    @field_validator('queue_id', 'document_id', 'user_id', mode='before')
-    @classmethod
-    def convert_uuid_to_str(cls, v):
-        """Convert UUID objects to strings"""
-        if isinstance(v, UUID):
-            return str(v)
-        return v
-
 
 class OCRResult(BaseModel):
     """OCR processing result"""
@@ -61,14 +44,6 @@ class EmbeddingChunk(BaseModel):
     embedding: List[float]
     content_hash: str
 
-    @field_validator('document_id', 'user_id', mode='before')
-    @classmethod
-    def convert_uuid_to_str(cls, v):
-        """Convert UUID objects to strings"""
-        if isinstance(v, UUID):
-            return str(v)
-        return v
-
 
 class QueueStats(BaseModel):
     """Queue statistics"""
@@ -97,12 +72,3 @@ class WebhookPayload(BaseModel):
     status: str  # "completed" or "failed"
     ocr_text: Optional[str] = None
     error_message: Optional[str] = None
-    secret: str
-
-    @field_validator('document_id', 'queue_id', mode='before')
-    @classmethod
-    def convert_uuid_to_str(cls, v):
-        """Convert UUID objects to strings"""
-        if isinstance(v, UUID):
-            return str(v)
-        return v
@@ -2,17 +2,68 @@
 
 from paddleocr import PaddleOCR
 import aiohttp
+import asyncio
+import hashlib
+import multiprocessing
+import numpy as np
 import tempfile
 import os
+import threading
 import time
-from pdf2image import convert_from_path
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pdf2image import convert_from_path, pdfinfo_from_path
 from PIL import Image
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Tuple
 from loguru import logger
 from app.config import settings
 from app.models import OCRResult
 
 
+def _create_paddle_ocr() -> PaddleOCR:
+    """Build the PaddleOCR pipeline (in this process or an OCR process)"""
+    # Initialize PaddleOCR with Spanish as primary language
+    # PaddleOCR will download models on first run (~200MB)
+    return PaddleOCR(
+        lang="es",  # Spanish primary
+        use_angle_cls=True,  # Detect text orientation
+        use_gpu=settings.ocr_use_gpu,  # CPU for 2vCPU VPS
+        # Paddle's own defaults are plain CPU kernels and 10 threads,
+        # which oversubscribes a small VPS
+        enable_mkldnn=settings.ocr_enable_mkldnn,
+        cpu_threads=settings.ocr_cpu_threads,
+        use_tensorrt=settings.ocr_use_tensorrt,
+        show_log=False,
+        use_space_char=True,  # Better word spacing
+        # Every text line detected on a page is a recognition crop;
+        # larger batches amortize per-call overhead (PaddleOCR's default is 6)
+        rec_batch_num=settings.ocr_rec_batch_num,
+        cls_batch_num=settings.ocr_rec_batch_num,
+        # Optional local inference models, e.g. PaddleSlim INT8-quantized
+        # exports; None keeps PaddleOCR's downloaded FP32 defaults
+        det_model_dir=settings.ocr_det_model_dir or None,
+        rec_model_dir=settings.ocr_rec_model_dir or None,
+        cls_model_dir=settings.ocr_cls_model_dir or None,
+        precision=settings.ocr_precision,
+    )
+
+
+# PaddleOCR instance of an OCR process (OCR_PROCESSES > 0), built by its initializer
+_process_ocr: Optional[PaddleOCR] = None
+
+
+def _init_process_ocr():
+    """ProcessPoolExecutor initializer: load the models once per process"""
+    global _process_ocr
+    _process_ocr = _create_paddle_ocr()
+
+
+def _run_process_ocr(image) -> list:
+    """Run OCR in an OCR process (each process handles one call at a time)"""
+    return _process_ocr.ocr(image, cls=True)
+
+
 class OCRWorker:
     """
     OCR Worker using PaddleOCR
@@ -23,18 +74,43 @@ class OCRWorker:
     - Layout analysis
     """
 
+    # Pages waiting between PDF pipeline stages; caps rendered pages in memory
+    PIPELINE_QUEUE_SIZE = 2
+
+    # Retries and re-uploads of the same file skip OCR; results are keyed by
+    # content hash + file type (LRU, size-bounded, lives as long as the
+    # process and therefore the loaded models)
+    OCR_RESULT_CACHE_SIZE = 32
+
     def __init__(self):
         logger.info("Loading PaddleOCR models...")
 
-        # Initialize PaddleOCR with Spanish as primary language
-        # PaddleOCR will download models on first run (~200MB)
-        self.ocr = PaddleOCR(
-            lang="es",  # Spanish primary
-            use_angle_cls=True,  # Detect text orientation
-            use_gpu=settings.ocr_use_gpu,  # CPU for 2vCPU VPS
-            show_log=False,
-            use_space_char=True,  # Better word spacing
-        )
+        self.ocr: Optional[PaddleOCR] = None
+        self._ocr_pool: Optional[ProcessPoolExecutor] = None
+
+        if settings.ocr_processes > 0:
+            # Separate OCR processes, each with its own copy of the models:
+            # no GIL shared with the event loop, and Paddle memory is freed
+            # with the process
+            self._ocr_pool = self._start_ocr_pool()
+        else:
+            self.ocr = _create_paddle_ocr()
+
+        # The Paddle predictors are not thread-safe; OCR runs on worker
+        # threads, one call at a time
+        self._ocr_lock = threading.Lock()
+
+        # Serializes rebuilding the OCR process pool after a process died
+        self._ocr_pool_rebuild_lock = asyncio.Lock()
+
+        # Bounds how many documents are rendered/recognized at once, so
+        # concurrent jobs overlap downloads without oversubscribing the CPU
+        self._ocr_slots = asyncio.Semaphore(settings.max_concurrent_ocr)
+
+        # Download session, reused across jobs for connection keep-alive
+        self._http: Optional[aiohttp.ClientSession] = None
+
+        self._result_cache: "OrderedDict[Tuple[str, str], Tuple[str, int]]" = OrderedDict()
 
         logger.info("✅ PaddleOCR models loaded")
 
@@ -52,14 +128,28 @@ class OCRWorker:
         start_time = time.time()
 
         # Download file
-        file_path = await self._download_file(file_url)
+        file_path, content_hash = await self._download_file(file_url)
 
         try:
-            if file_type == "application/pdf":
-                text, page_count = await self._process_pdf(file_path)
-            else:  # Image files
-                text = await self._process_image(file_path)
-                page_count = 1
+            cache_key = (content_hash, file_type)
+            cached = self._result_cache.get(cache_key)
+
+            if cached is not None:
+                self._result_cache.move_to_end(cache_key)
+                text, page_count = cached
+                logger.info("♻️ Same file already processed, reusing OCR result")
+            else:
+                async with self._ocr_slots:
+                    if file_type == "application/pdf":
+                        text, page_count = await self._process_pdf(file_path)
+                    else:  # Image files
+                        text = await self._process_image(file_path)
+                        page_count = 1
+
+                if text.strip():
+                    self._result_cache[cache_key] = (text, page_count)
+                    while len(self._result_cache) > self.OCR_RESULT_CACHE_SIZE:
+                        self._result_cache.popitem(last=False)
 
             processing_time = time.time() - start_time
 
@@ -73,40 +163,76 @@ class OCRWorker:
             )
 
         finally:
-            # Clean up temp file
-            if os.path.exists(file_path):
-                os.remove(file_path)
+            # Clean up temp file (unlink directly; no stat() first)
+            try:
+                os.unlink(file_path)
                 logger.debug(f"Cleaned up temp file: {file_path}")
+            except FileNotFoundError:
+                pass
+
+    async def close(self):
+        """Close the download session and stop the OCR processes"""
+        if self._http is not None:
+            await self._http.close()
+            self._http = None
+
+        # Waits out a pool rebuild in progress so the new pool is shut down too
+        async with self._ocr_pool_rebuild_lock:
+            if self._ocr_pool is not None:
+                await asyncio.to_thread(self._ocr_pool.shutdown, cancel_futures=True)
+                self._ocr_pool = None
+
+    def _get_http_session(self) -> aiohttp.ClientSession:
+        """Get the download session (created on first use, on the event loop)"""
+        if self._http is None or self._http.closed:
+            self._http = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=32, ttl_dns_cache=300, keepalive_timeout=60
+                ),
+            )
+        return self._http
 
-    async def _download_file(self, url: str) -> str:
-        """Download file from URL to temp directory"""
+    async def _download_file(self, url: str) -> Tuple[str, str]:
+        """Download file from URL to temp directory (returns path and content hash)"""
         try:
             logger.info(f"Downloading file from: {url[:50]}...")
 
-            async with aiohttp.ClientSession() as session:
-                async with session.get(
-                    url, timeout=aiohttp.ClientTimeout(total=settings.download_timeout_seconds)
-                ) as response:
-                    if response.status != 200:
-                        raise Exception(f"Failed to download file: HTTP {response.status}")
-
-                    content = await response.read()
-
-                    # Check file size
-                    size_mb = len(content) / (1024 * 1024)
-                    if size_mb > settings.max_file_size_mb:
-                        raise Exception(
-                            f"File too large: {size_mb:.1f}MB (max: {settings.max_file_size_mb}MB)"
-                        )
-
-                    # Save to temp file
-                    suffix = ".pdf" if "pdf" in url.lower() else ".jpg"
-                    with tempfile.NamedTemporaryFile(
-                        delete=False, suffix=suffix, dir=settings.temp_dir
-                    ) as tmp:
-                        tmp.write(content)
-                        logger.info(f"Downloaded {size_mb:.1f}MB to {tmp.name}")
-                        return tmp.name
+            async with self._get_http_session().get(
+                url, timeout=aiohttp.ClientTimeout(total=settings.download_timeout_seconds)
+            ) as response:
+                if response.status != 200:
+                    raise Exception(f"Failed to download file: HTTP {response.status}")
+
+                # Reject early when the server announces the size
+                max_bytes = settings.max_file_size_mb * 1024 * 1024
+                if response.content_length is not None and response.content_length > max_bytes:
+                    raise Exception(
+                        f"File too large: {response.content_length / (1024 * 1024):.1f}MB "
+                        f"(max: {settings.max_file_size_mb}MB)"
+                    )
+
+                # Stream to the temp file; the body is never held in memory
+                suffix = ".pdf" if "pdf" in url.lower() else ".jpg"
+                size = 0
+                digest = hashlib.blake2b(digest_size=16)
+                with tempfile.NamedTemporaryFile(
+                    delete=False, suffix=suffix, dir=settings.temp_dir
+                ) as tmp:
+                    try:
+                        async for chunk in response.content.iter_chunked(1 << 16):
+                            size += len(chunk)
+                            if size > max_bytes:
+                                raise Exception(
+                                    f"File too large: over {settings.max_file_size_mb}MB"
+                                )
+                            tmp.write(chunk)
+                            digest.update(chunk)
+                    except BaseException:
+                        os.remove(tmp.name)
+                        raise
+
+                    logger.info(f"Downloaded {size / (1024 * 1024):.1f}MB to {tmp.name}")
+                    return tmp.name, digest.hexdigest()
 
         except Exception as e:
             logger.error(f"Failed to download file: {e}")
@@ -116,47 +242,73 @@ class OCRWorker:
         """
         Extract text from PDF
 
-        Converts PDF pages to images and runs OCR on each
+        Pages flow through three stages connected by bounded queues
+        (render -> pixel array -> OCR), so Poppler renders the next page while
+        the current one is in OCR
         """
         logger.info(f"Converting PDF to images: {pdf_path}")
 
         try:
-            # Convert PDF to images (200 DPI is good balance for OCR)
-            images = convert_from_path(
-                pdf_path,
-                dpi=200,
-                fmt="jpeg",
-                thread_count=settings.worker_threads,
-            )
-
-            page_count = len(images)
+            info = await asyncio.to_thread(pdfinfo_from_path, pdf_path)
+            page_count = info["Pages"]
             logger.info(f"PDF has {page_count} page(s)")
 
+            render_q: asyncio.Queue = asyncio.Queue(maxsize=self.PIPELINE_QUEUE_SIZE)
+            ocr_q: asyncio.Queue = asyncio.Queue(maxsize=self.PIPELINE_QUEUE_SIZE)
             all_text = []
 
-            for i, image in enumerate(images):
-                logger.info(f"Processing page {i + 1}/{page_count}")
-
-                # Save image temporarily
-                img_path = os.path.join(settings.temp_dir, f"page_{i}_{os.getpid()}.jpg")
-                image.save(img_path, "JPEG", quality=85)
-
+            async def render():
+                # Every page is its own pdftoppm process, so up to
+                # PDF_RENDER_WORKERS pages render in parallel from plain
+                # threads; they are queued in page order
+                in_flight = deque()
                 try:
-                    # Run OCR on image
-                    result = self.ocr.ocr(img_path, cls=True)
-
-                    # Extract text
+                    for page in range(1, page_count + 1):
+                        rendering = asyncio.ensure_future(
+                            asyncio.to_thread(self._render_page, pdf_path, page)
+                        )
+                        in_flight.append((page, rendering))
+                        if len(in_flight) >= settings.pdf_render_workers:
+                            done_page, rendering = in_flight.popleft()
+                            await render_q.put((done_page, await rendering))
+                    while in_flight:
+                        done_page, rendering = in_flight.popleft()
+                        await render_q.put((done_page, await rendering))
+                finally:
+                    for _, rendering in in_flight:
+                        rendering.cancel()
+                await render_q.put(None)
+
+            async def prepare():
+                while (item := await render_q.get()) is not None:
+                    page, image = item
+                    # Pixels go to PaddleOCR in memory; no JPEG temp file
+                    pixels = await asyncio.to_thread(self._to_bgr_array, image)
+                    await ocr_q.put((page, pixels))
+                await ocr_q.put(None)
+
+            async def recognize():
+                while (item := await ocr_q.get()) is not None:
+                    page, pixels = item
+                    logger.debug("Processing page {}/{}", page, page_count)
+
+                    result = await self._ocr_image(pixels)
                     page_text = self._extract_text_from_result(result)
 
                     if page_text.strip():
-                        all_text.append(f"=== Página {i + 1} ===\n{page_text}")
+                        all_text.append(f"=== Página {page} ===\n{page_text}")
                     else:
-                        logger.warning(f"No text found on page {i + 1}")
+                        logger.warning(f"No text found on page {page}")
 
-                finally:
-                    # Clean up temp image
-                    if os.path.exists(img_path):
-                        os.remove(img_path)
+            stages = [asyncio.create_task(stage()) for stage in (render, prepare, recognize)]
+            try:
+                await asyncio.gather(*stages)
+            finally:
+                # A failed stage must not leave the others blocked on a queue
+                for stage in stages:
+                    stage.cancel()
+
+            logger.info(f"Recognized {page_count} page(s), {len(all_text)} with text")
 
             full_text = "\n\n".join(all_text)
             return full_text, page_count
@@ -171,7 +323,7 @@ class OCRWorker:
 
         try:
             # Run OCR
-            result = self.ocr.ocr(image_path, cls=True)
+            result = await self._ocr_image(image_path)
 
             # Extract text
             text = self._extract_text_from_result(result)
@@ -185,6 +337,82 @@ class OCRWorker:
             logger.error(f"Image processing failed: {e}")
             raise
 
+    @staticmethod
+    def _render_page(pdf_path: str, page: int) -> Image.Image:
+        """Render one PDF page (blocking; call from a worker thread)"""
+        # PPM is uncompressed, so pdf2image skips an encode/decode pass.
+        # Lower OCR_DPI / OCR_GRAYSCALE shrink pages (grayscale is a third of
+        # the pixels through the pipe), but their accuracy effect is
+        # unmeasured: 10-12pt text at 150 DPI is ~21-25px tall, below the
+        # recognizer's 48px input height, so line crops get upscaled
+        images = convert_from_path(
+            pdf_path,
+            dpi=settings.ocr_dpi,
+            grayscale=settings.ocr_grayscale,
+            fmt="ppm",
+            first_page=page,
+            last_page=page,
+        )
+        return images[0]
+
+    @staticmethod
+    def _to_bgr_array(image: Image.Image) -> np.ndarray:
+        """PIL page -> contiguous BGR array, the layout PaddleOCR reads (as cv2 does)"""
+        if image.mode == "L":
+            # PaddleOCR needs three channels; for gray pages RGB == BGR
+            return np.array(image.convert("RGB"))
+        return np.ascontiguousarray(np.asarray(image.convert("RGB"))[:, :, ::-1])
+
+    @staticmethod
+    def _start_ocr_pool() -> ProcessPoolExecutor:
+        """Start the OCR processes and wait for their models to load (blocking)"""
+        # spawn, because paddle is not fork-safe
+        pool = ProcessPoolExecutor(
+            max_workers=settings.ocr_processes,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_process_ocr,
+        )
+        # Start every process now so models load up front, not on the first job
+        try:
+            for future in [pool.submit(time.sleep, 0) for _ in range(settings.ocr_processes)]:
+                future.result()
+        except BaseException:
+            pool.shutdown(cancel_futures=True)
+            raise
+        return pool
+
+    async def _rebuild_ocr_pool(self, broken_pool: ProcessPoolExecutor):
+        """Replace a broken OCR process pool (once, however many calls saw it break)"""
+        async with self._ocr_pool_rebuild_lock:
+            if self._ocr_pool is not broken_pool:
+                return
+
+            logger.warning("⚠️ An OCR process died, restarting the OCR process pool")
+            broken_pool.shutdown(wait=False, cancel_futures=True)
+            self._ocr_pool = await asyncio.to_thread(self._start_ocr_pool)
+            logger.info("✅ OCR process pool restarted")
+
+    async def _ocr_image(self, image) -> list:
+        """Run OCR off the event loop (OCR process pool, else a worker thread)"""
+        if self._ocr_pool is None:
+            return await asyncio.to_thread(self._run_ocr, image)
+
+        loop = asyncio.get_running_loop()
+        pool = self._ocr_pool
+        try:
+            return await loop.run_in_executor(pool, _run_process_ocr, image)
+        except BrokenProcessPool:
+            # A dead process (OOM kill, segfault) breaks the whole executor;
+            # rebuild it and retry this page once. If the page itself kills
+            # the process again, only this job fails
+            await self._rebuild_ocr_pool(pool)
+            return await loop.run_in_executor(self._ocr_pool, _run_process_ocr, image)
+
+    def _run_ocr(self, image) -> list:
+        """Run PaddleOCR on an image (blocking; call from a worker thread)"""
+        with self._ocr_lock:
+            return self.ocr.ocr(image, cls=True)
+
     def _extract_text_from_result(self, result) -> str:
         """
         Extract text from PaddleOCR result
@@ -198,17 +426,18 @@ class OCRWorker:
 
         for line in result[0]:
             try:
-                # Extract text and confidence
-                text = line[1][0]  # Text string
-                confidence = line[1][1]  # Confidence score
+                # Extract text and confidence (one index into the line)
+                text, confidence = line[1]
 
                 # Only include text with reasonable confidence
                 if confidence > 0.5:
                     lines.append(text)
                 else:
-                    logger.debug(f"Low confidence text skipped: '{text}' ({confidence:.2f})")
+                    # Positional args: loguru drops the call before formatting
+                    # anything unless DEBUG is enabled
+                    logger.debug("Low confidence text skipped: '{}' ({:.2f})", text, confidence)
 
-            except (IndexError, TypeError) as e:
+            except (IndexError, TypeError, ValueError) as e:
                 logger.warning(f"Failed to extract text from line: {e}")
                 continue
 
@@ -1,6 +1,12 @@
 """Webhook notifier - Send results back to Realthor"""
 
 import aiohttp
+import asyncio
+import hashlib
+import hmac
+import orjson
+import random
+import time
 from typing import Optional
 from loguru import logger
 from app.config import settings
@@ -14,6 +20,15 @@ class WebhookNotifier:
     Sends OCR results back to Realthor main application
     """
 
+    # 5xx/429/network errors are retried with jittered exponential backoff
+    MAX_ATTEMPTS = 3
+    MAX_BACKOFF_SECONDS = 10
+
+    # After this many notifications fail in a row, skip sending for a while
+    # instead of piling retries onto a degraded endpoint
+    CIRCUIT_FAILURE_THRESHOLD = 5
+    CIRCUIT_OPEN_SECONDS = 60
+
     def __init__(self):
         self.enabled = settings.webhook_enabled
         self.url = settings.kairo_webhook_url
@@ -26,6 +41,33 @@ class WebhookNotifier:
         if self.enabled and not self.secret:
             logger.warning("⚠️ Webhook enabled but secret not configured")
 
+        # Requests are signed (HMAC-SHA256 of the body); the secret itself is
+        # never sent
+        self._signing_key = self.secret.encode() if self.secret else None
+
+        self._consecutive_failures = 0
+        self._circuit_open_until = 0.0
+
+        # Reused across notifications so repeat POSTs skip the TCP/TLS handshake
+        self._http: Optional[aiohttp.ClientSession] = None
+
+    async def close(self):
+        """Close the webhook session"""
+        if self._http is not None:
+            await self._http.close()
+            self._http = None
+
+    def _get_http_session(self) -> aiohttp.ClientSession:
+        """Get the webhook session (created on first use)"""
+        if self._http is None or self._http.closed:
+            self._http = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=32, ttl_dns_cache=300, keepalive_timeout=60
+                ),
+                timeout=aiohttp.ClientTimeout(total=30),
+            )
+        return self._http
+
     async def notify_success(
         self, document_id: str, queue_id: str, ocr_text: str
     ) -> bool:
@@ -49,7 +91,6 @@ class WebhookNotifier:
             queue_id=queue_id,
             status="completed",
             ocr_text=ocr_text,
-            secret=self.secret or "",
         )
 
         return await self._send_webhook(payload)
@@ -77,32 +118,63 @@ class WebhookNotifier:
             queue_id=queue_id,
             status="failed",
             error_message=error_message,
-            secret=self.secret or "",
         )
 
         return await self._send_webhook(payload)
 
     async def _send_webhook(self, payload: WebhookPayload) -> bool:
-        """Send webhook POST request"""
-        try:
-            logger.info(f"Sending webhook to {self.url}")
+        """Send webhook POST request (retried on transient failures)"""
+        if time.monotonic() < self._circuit_open_until:
+            logger.warning("⚠️ Webhook endpoint failing, skipping notification")
+            return False
 
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
+        # orjson writes the (possibly multi-MB) OCR text straight to bytes;
+        # aiohttp's json= would go through stdlib json.dumps and a str
+        body = orjson.dumps(payload.model_dump())
+        headers = {"Content-Type": "application/json"}
+        if self._signing_key:
+            # Signed over the exact bytes sent, so the receiver verifies
+            # the raw body before parsing it
+            headers["X-Realthor-Signature"] = hmac.new(
+                self._signing_key, body, hashlib.sha256
+            ).hexdigest()
+
+        for attempt in range(1, self.MAX_ATTEMPTS + 1):
+            try:
+                logger.info(f"Sending webhook to {self.url}")
+
+                async with self._get_http_session().post(
                     self.url,
-                    json=payload.model_dump(),
-                    timeout=aiohttp.ClientTimeout(total=30),
+                    data=body,
+                    headers=headers,
                 ) as response:
                     if response.status == 200:
                         logger.info(f"✅ Webhook sent successfully")
+                        self._consecutive_failures = 0
                         return True
-                    else:
-                        error_text = await response.text()
-                        logger.error(
-                            f"❌ Webhook failed: HTTP {response.status} - {error_text}"
-                        )
-                        return False
-
-        except Exception as e:
-            logger.error(f"❌ Failed to send webhook: {e}")
-            return False
+
+                    error_text = await response.text()
+                    logger.error(
+                        f"❌ Webhook failed: HTTP {response.status} - {error_text}"
+                    )
+                    # Other client errors won't succeed on a retry
+                    if response.status < 500 and response.status != 429:
+                        break
+
+            except Exception as e:
+                logger.error(f"❌ Failed to send webhook: {e}")
+
+            if attempt < self.MAX_ATTEMPTS:
+                delay = min(2 ** (attempt - 1), self.MAX_BACKOFF_SECONDS)
+                await asyncio.sleep(delay + random.random())
+
+        self._consecutive_failures += 1
+        if self._consecutive_failures >= self.CIRCUIT_FAILURE_THRESHOLD:
+            logger.warning(
+                f"⚠️ {self._consecutive_failures} webhooks failed in a row, "
+                f"pausing notifications for {self.CIRCUIT_OPEN_SECONDS}s"
+            )
+            self._circuit_open_until = time.monotonic() + self.CIRCUIT_OPEN_SECONDS
+            self._consecutive_failures = 0
+
+        return False
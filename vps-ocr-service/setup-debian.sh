@@ -116,6 +116,7 @@ echo "⏳ This may take 5-10 minutes to download and install packages (~1.5GB)"
     python-dotenv==1.0.0 \
     pydantic==2.5.3 \
     pydantic-settings==2.1.0 \
+    orjson==3.9.10 \
     loguru==0.7.2
 
 # Install PyTorch CPU version and sentence-transformers separately